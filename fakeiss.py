@@ -0,0 +1,259 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Локальный сервер ISS для замеров и проверок без биржи
+
+Отвечает на запросы, которые программа делает через moexalgo:
+справочники акций и индексов (securities.json, columns.json), свечи
+(candles.json, по PAGE строк за запрос, продолжение по start, как в
+ISS) и расписание торгов (engines/stock.json). Свечи синтетические:
+по будням, внутридневные - с 10:00 до 19:00, D - одна в день,
+W - по понедельникам, M - в первый будний день месяца.
+Сервер считает HTTP запросы и TCP соединения (requests, connections),
+fail(n) - следующие n запросов получат 503.
+
+    iss = FakeIss()
+    iss.start()
+    md = MoexData(http=HttpSession(base_url=iss.url))
+    ...
+    iss.stop()
+
+Отдельно, для ручной проверки:
+
+    python3 fakeiss.py --port 8000
+"""
+
+import sys
+import gzip
+import json
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+PAGE = 500  # строк candles.json за запрос, как у ISS
+TICKERS = ("SBER", "GAZP", "LKOH", "YNDX")
+SESSION_BEGIN = 10 * 60  # минут от начала суток
+SESSION_MINUTES = 9 * 60
+INTERVALS = {1: 1, 10: 10, 60: 60, 24: 1440, 7: 1440, 31: 1440}
+CANDLE_COLUMNS = (
+    "open", "close", "high", "low", "value", "volume", "begin", "end",
+    )
+CANDLE_TYPES = ("double",) * 6 + ("datetime",) * 2
+
+
+def section(columns, types, rows):
+    """ Блок ответа ISS в формате iss.json=extended """
+    return {
+        "metadata": {c: {"type": t} for c, t in zip(columns, types)},
+        "columns": list(columns),
+        "data": rows,
+        }
+
+
+def dayMinutes(day, interval):
+    """ Начала свечей дня в минутах от полуночи """
+    if day.weekday() >= 5:
+        return range(0)
+    if interval == 7 and day.weekday() != 0:
+        return range(0)
+    if interval == 31 and day != firstWeekday(day):
+        return range(0)
+    step = INTERVALS[interval]
+    if step >= 1440:
+        return range(0, 1)
+    return range(SESSION_BEGIN, SESSION_BEGIN + SESSION_MINUTES, step)
+
+
+def firstWeekday(day):
+    first = day.replace(day=1)
+    while first.weekday() >= 5:
+        first += timedelta(days=1)
+    return first
+
+
+def candles(begin, till, interval, start):
+    """ Страница свечей [begin, till] с номера start, не больше PAGE
+    --
+    Пропущенные start свечей не создаются - считаются по дням.
+    """
+    step = timedelta(minutes=INTERVALS[interval])
+    rows = list()
+    day = datetime(begin.year, begin.month, begin.day)
+    while day <= till and len(rows) < PAGE:
+        minutes = [
+            i for i in dayMinutes(day, interval)
+            if begin <= day + timedelta(minutes=i) <= till
+            ]
+        if start >= len(minutes):
+            start -= len(minutes)
+        else:
+            for i in minutes[start:start + PAGE - len(rows)]:
+                dt = day + timedelta(minutes=i)
+                end = dt + step - timedelta(seconds=1)
+                rows.append([
+                    100.0, 101.0, 102.0, 99.0, 1000.5, 10,
+                    f"{dt:%Y-%m-%d %H:%M:%S}", f"{end:%Y-%m-%d %H:%M:%S}",
+                    ])
+            start = 0
+        day += timedelta(days=1)
+    return rows
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у ISS
+    # заголовки и тело уходят отдельными пакетами, без TCP_NODELAY
+    # каждый ответ ждал бы delayed ACK клиента (~40 ms)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        self.server.iss.count("connections")
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        iss = self.server.iss
+        iss.count("requests")
+        if iss.failed():
+            self.__send(503, b"")
+            return
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        body = self.__route(url.path, query)
+        if body is None:
+            self.__send(404, b"")
+            return
+        data = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        self.__send(200, data, headers)
+
+    def __route(self, path, query):
+        tickers = self.server.iss.tickers
+        if path.endswith("/candles.json"):
+            begin = datetime.fromisoformat(query["from"])
+            till = datetime.fromisoformat(query["till"])
+            if len(query["till"]) == 10:
+                till = till.replace(hour=23, minute=59)
+            rows = candles(
+                begin, till, int(query["interval"]),
+                int(query.get("start", 0)),
+                )
+            return {"candles": section(CANDLE_COLUMNS, CANDLE_TYPES, rows)}
+        if path.endswith("/securities/columns.json"):
+            return {
+                "securities": section(
+                    ["name"], ["string"], [["SECID"], ["SECNAME"]]
+                    ),
+                "marketdata": section(["name"], ["string"], [["SECID"]]),
+                }
+        if path.endswith("engines/stock.json"):
+            week = [
+                [i, int(i < 6), "10:00:00", "19:00:00"] for i in range(1, 8)
+                ]
+            return {
+                "engine": section(["id"], ["int32"], [[1]]),
+                "timetable": section(
+                    ["week_day", "is_work_day", "start_time", "stop_time"],
+                    ["int32", "int32", "string", "string"],
+                    week,
+                    ),
+                "dailytable": section(
+                    ["date", "is_work_day", "start_time", "stop_time"],
+                    ["date", "int32", "string", "string"],
+                    [],
+                    ),
+                }
+        if path.endswith("/securities.json"):
+            if "/index/" in path:
+                tickers = ("IMOEX",)
+            rows = [[i, f"{i} name", i] for i in tickers]
+            return {
+                "securities": section(
+                    ["SECID", "SECNAME", "SHORTNAME"], ["string"] * 3, rows
+                    ),
+                "marketdata": section(
+                    ["SECID"], ["string"], [[i] for i in tickers]
+                    ),
+                }
+        return None
+
+    def __send(self, status, data, headers=None):
+        self.send_response(status)
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeIss():
+    def __init__(self, port=0, tickers=TICKERS):
+        """ port=0 - любой свободный порт, см. url """
+        self.tickers = tuple(tickers)
+        self.requests = 0
+        self.connections = 0
+        self.__fail = 0
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.__server.daemon_threads = True
+        self.__server.iss = self
+
+    @property  #url
+    def url(self):
+        return f"http://127.0.0.1:{self.__server.server_port}/iss"
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.__server.serve_forever, daemon=True
+            )
+        thread.start()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def count(self, name):
+        with self.__lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def fail(self, count):
+        """ Следующие count запросов получат 503 """
+        with self.__lock:
+            self.__fail = count
+
+    def failed(self):
+        with self.__lock:
+            if self.__fail > 0:
+                self.__fail -= 1
+                return True
+            return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный сервер ISS")
+    parser.add_argument(
+        "--port", type=int, default=8000, help="порт, по умолчанию 8000"
+        )
+    args = parser.parse_args()
+    iss = FakeIss(args.port)
+    print(f"Serve {iss.url}, Ctrl+C - stop")
+    try:
+        iss.start()
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        iss.stop()
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Замер загрузки многолетней 1m истории с локального сервера ISS
+
+Поднимает fakeiss.FakeIss и загружает несколько лет 1m одной акции
+двумя способами:
+    windows - MoexData.download по годам: окна MoexData.WINDOW, один
+              Ticker на акцию, запись на диск (во временную папку)
+    per day - прежний способ: новый Ticker и отдельный запрос
+              Ticker.candles на каждый календарный день, только прием
+Оба способа идут через HttpSession с одинаковой постоянной частотой
+запросов (--rate), поэтому время сравнимо. Выводит количество HTTP
+запросов и соединений, свечей и время.
+
+    python3 fetchbench.py
+    python3 fetchbench.py --years 2020 2023 --rate 20
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from fakeiss import FakeIss
+from src.const import REQUEST_RATE_MAX
+from src.limiter import AdaptiveLimiter
+from src.session import HttpSession
+
+TICKER = "SBER"
+YEARS = (2022, 2023)
+
+
+def windows(http, years):
+    """ Свечей загружено MoexData.download """
+    from src.moex import MoexData
+    md = MoexData(http=http)
+    for year in range(years[0], years[1] + 1):
+        md.download(TICKER, "1m", year)
+    return md.index.info(TICKER, "1m")["count"]
+
+
+def perDay(http, years):
+    """ Свечей получено запросами по одному дню """
+    from moexalgo import Market, Ticker
+    # справочник для Ticker() - один раз, как в MoexData
+    Market("stocks").tickers(cs=http.session())
+    count = 0
+    day = datetime(years[0], 1, 1)
+    while day < datetime(years[1] + 1, 1, 1):
+        candles = Ticker(TICKER).candles(
+            date=       day,
+            till_date=  day + timedelta(hours=23, minutes=59),
+            period=     "1m",
+            cs=         http.session(),
+            )
+        count += sum(1 for _ in candles)
+        day += timedelta(days=1)
+    return count
+
+
+def measure(func, years, rate):
+    iss = FakeIss()
+    iss.start()
+    limiter = AdaptiveLimiter(rate=rate, min_rate=rate, max_rate=rate)
+    http = HttpSession(base_url=iss.url, limiter=limiter)
+    try:
+        begin = time.perf_counter()
+        count = func(http, years)
+        seconds = time.perf_counter() - begin
+    finally:
+        iss.stop()
+    return count, iss.requests, iss.connections, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка 1m с fake ISS")
+    parser.add_argument(
+        "--years", type=int, nargs=2, default=YEARS,
+        metavar=("FIRST", "LAST"),
+        help=f"период, по умолчанию {YEARS[0]} {YEARS[1]}",
+        )
+    parser.add_argument(
+        "--rate", type=float, default=REQUEST_RATE_MAX,
+        help=f"запросов в секунду, по умолчанию {REQUEST_RATE_MAX}",
+        )
+    args = parser.parse_args()
+    os.chdir(tempfile.mkdtemp())  # download/ и list/ не трогают данные
+    print(
+        f"{'MODE':<10}{'CANDLES':>10}{'REQUESTS':>10}{'CONNECT':>9}"
+        f"{'TIME, s':>10}"
+        )
+    for name, func in (("windows", windows), ("per day", perDay)):
+        count, requests, connections, seconds = measure(
+            func, args.years, args.rate
+            )
+        print(
+            f"{name:<10}{count:>10}{requests:>10}{connections:>9}"
+            f"{seconds:>10.2f}"
+            )
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
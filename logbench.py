@@ -0,0 +1,64 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Замер стоимости логирования на частых вызовах Cmd
+
+Логгер настраивается как в main.py (файл через очередь, см. src.log),
+затем Cmd.join / Cmd.isExist / Cmd.getFiles вызываются в цикле дважды:
+с уровнем LOGGER.utils = DEBUG (каждый вызов пишет сообщение в лог) и
+с уровнем по умолчанию из LOG_LEVELS (отладка выключена).
+
+    python3 logbench.py
+    python3 logbench.py -n 200000
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from src.const import LOG_LEVELS
+from src.log import configLogger, setLevels
+from src.utils import Cmd
+
+CALLS = 100_000
+
+
+def bench(func, count):
+    """ Вызовов в секунду """
+    begin = time.perf_counter()
+    for i in range(count):
+        func()
+    return count / (time.perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стоимость логирования Cmd")
+    parser.add_argument(
+        "-n", type=int, default=CALLS,
+        help=f"количество вызовов, по умолчанию {CALLS}",
+        )
+    args = parser.parse_args()
+    tmp_dir = tempfile.mkdtemp()
+    configLogger("LOGGER", file_path=Cmd.join(tmp_dir, "bench.log"))
+    cases = (
+        ("Cmd.join", lambda: Cmd.join("download", "SBER", "1m"), args.n),
+        ("Cmd.isExist", lambda: Cmd.isExist(tmp_dir), args.n),
+        ("Cmd.getFiles", lambda: Cmd.getFiles(tmp_dir), args.n // 10),
+        )
+    print(f"{'CALL':<16}{'DEBUG, 1/s':>14}{'DEFAULT, 1/s':>14}{'SPEEDUP':>10}")
+    for name, func, count in cases:
+        setLevels({"LOGGER.utils": logging.DEBUG})
+        on = bench(func, count)
+        setLevels({"LOGGER.utils": LOG_LEVELS["LOGGER.utils"]})
+        off = bench(func, count)
+        print(f"{name:<16}{on:>14.0f}{off:>14.0f}{off / on:>9.1f}x")
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,20 +11,29 @@
 Использует официальную библиотеку 'moexalgo'.
 Доступные таймфреймы: '1m', '10m', '1h', 'D', 'W', 'M'
 
+Без аргументов запускается GUI, с аргументами - консольный режим,
+см. src/cli.py:
+    python3 main.py download -l all -f 1m D -j 8
+    python3 main.py update -l all -f 1m D --resume
+    python3 main.py status -t SBER -f 1m
+
 """
 
 import sys
-import logging
-import PyQt6
-from src.gui.download_dialog import DownloadDialog
-from src.gui.custom import Palette
-from src.const import LOG_DIR, LOG_FILE
-from src.utils import Cmd
+from src.log import configLogger
 
 
 def main():
     configLogger("LOGGER")
-    app = PyQt6.QtWidgets.QApplication(sys.argv)
+    if len(sys.argv) > 1:
+        # консольный режим, PyQt6 не импортируется
+        from src.cli import cli
+        code = cli(sys.argv[1:])
+        sys.exit(code)
+    from PyQt6 import QtWidgets
+    from src.gui.download_dialog import DownloadDialog
+    from src.gui.custom import Palette
+    app = QtWidgets.QApplication(sys.argv)
     user_palette = Palette()
     app.setPalette(user_palette)
     w = DownloadDialog()
@@ -32,20 +41,7 @@ def main():
     code = app.exec()
     sys.exit(code)
 
-def configLogger(name: str) -> None:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    if not Cmd.isExist(LOG_DIR):
-        Cmd.createDirs(LOG_DIR)
-    # create file handler
-    file_formatter = logging.Formatter(
-        "%(module)s: %(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        )
-    file_handler = logging.FileHandler(LOG_FILE, mode='w')
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Проверка потолка памяти потоковой записи свечей
+
+Синтетические 1m свечи (540 в торговый день) генератором подаются в
+Writer, как это делает MoexData.download, для периодов разной длины.
+Пик памяти по tracemalloc должен оставаться ниже потолка и не расти с
+длиной периода - в памяти только буфер Writer.BATCH свечей.
+Затем в уже записанные файлы разного размера дописывается один день,
+как в ежедневном update: время дописывания не должно зависеть от
+размера файла - свечи дописываются в конец, файл не копируется.
+
+    python3 membench.py
+    python3 membench.py --storage bin --ceiling 16
+
+Код завершения 1, если потолок превышен.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from src.resample import Candle
+from src.storage import STORAGES, Writer, getStorage
+from src.utils import Cmd
+
+MEMORY_CEILING = 16  # MB, пик при записи
+MONTHS = (1, 3, 12)
+DAY_CANDLES = 540  # 10:00 - 19:00
+
+
+def iterCandles(begin, days):
+    """ Свечи 1m рабочих дней, начиная с begin """
+    day = begin
+    while days > 0:
+        if day.weekday() < 5:
+            for i in range(DAY_CANDLES):
+                dt = day + timedelta(hours=10, minutes=i)
+                yield Candle(
+                    100.0, 101.0, 102.0, 99.0, 1000.5, 10,
+                    dt, dt + timedelta(seconds=59),
+                    )
+            days -= 1
+        day += timedelta(days=1)
+
+
+def writeFile(storage, path, months):
+    """ Записывает months месяцев, возвращает (свечей, пик MB, сек) """
+    tracemalloc.start()
+    begin = time.perf_counter()
+    with Writer(storage, path) as writer:
+        for candle in iterCandles(datetime(2024, 1, 1), months * 21):
+            writer.write(candle)
+    seconds = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return writer.count, peak / 2**20, seconds
+
+
+def appendDay(storage, path):
+    """ Дописывает один день в конец path, возвращает сек """
+    begin = time.perf_counter()
+    with Writer(storage, path, append=True) as writer:
+        for candle in iterCandles(datetime(2025, 1, 1), 1):
+            writer.write(candle)
+    return time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потолок памяти записи")
+    parser.add_argument(
+        "--storage", choices=list(STORAGES), nargs="+",
+        default=list(STORAGES), help="форматы хранения, по умолчанию все",
+        )
+    parser.add_argument(
+        "--ceiling", type=float, default=MEMORY_CEILING,
+        help=f"потолок в MB, по умолчанию {MEMORY_CEILING}",
+        )
+    args = parser.parse_args()
+    tmp_dir = tempfile.mkdtemp()
+    code = 0
+    print(
+        f"{'STORAGE':<9}{'MONTHS':>7}{'CANDLES':>10}{'PEAK, MB':>10}"
+        f"{'WRITE, s':>10}{'APPEND DAY, ms':>16}  STATUS"
+        )
+    for name in args.storage:
+        storage = getStorage(name)
+        for months in MONTHS:
+            path = Cmd.join(tmp_dir, f"{name}-{months}{storage.EXTENSION}")
+            count, peak, seconds = writeFile(storage, path, months)
+            append = appendDay(storage, path) * 1000
+            status = "ok"
+            if peak > args.ceiling:
+                status = f"over ceiling {args.ceiling} MB"
+                code = 1
+            print(
+                f"{name:<9}{months:>7}{count:>10}{peak:>10.1f}"
+                f"{seconds:>10.2f}{append:>16.1f}  {status}"
+                )
+    return code
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Проверка линейности update с переходом через границу года
+
+MoexData.update получает n синтетических 1m свечей с 20 декабря, часть
+дописывается в файл текущего года, остальные уходят в файл следующего
+(сеть не используется: iterCandles отдает свечи из генератора). Время
+на свечу не должно расти с n. Для сравнения рядом - прежнее разбиение
+по годам через list.pop(0), квадратичное по n.
+
+    python3 splitbench.py
+    python3 splitbench.py -n 50000 400000 --storage csv
+
+Код завершения 1, если время на свечу при самом большом n больше, чем
+при самом маленьком, в MAX_GROWTH раз.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import itertools
+from datetime import datetime, timedelta
+from src.moex import MoexData
+from src.resample import Candle
+from src.storage import STORAGES
+
+COUNTS = (25_000, 50_000, 100_000, 200_000)
+MAX_GROWTH = 2.0
+TICKER = "SBER"
+BEGIN = datetime(2023, 12, 20, 10)
+
+
+def iterMinutes(begin, end):
+    dt = begin
+    while dt < end:
+        yield Candle(
+            100.0, 101.0, 102.0, 99.0, 1000.5, 10,
+            dt, dt + timedelta(seconds=59),
+            )
+        dt += timedelta(minutes=1)
+
+
+class LocalData(MoexData):
+    """ MoexData со свечами из генератора вместо ISS, не больше limit """
+    limit = 1
+
+    def iterCandles(self, ticker, timeframe, begin, end):
+        candles = iterMinutes(max(begin, BEGIN), end)
+        return itertools.islice(candles, self.limit)
+
+
+def update(storage, count):
+    """ Секунд на update count свечей после одной загруженной """
+    os.chdir(tempfile.mkdtemp())  # свой download/ на каждый замер
+    md = LocalData(storage=storage)
+    md.download(TICKER, "1m", BEGIN.year)
+    md.limit = count
+    begin = time.perf_counter()
+    md.update(TICKER, "1m", end=BEGIN + timedelta(minutes=count + 1))
+    return time.perf_counter() - begin
+
+
+def popYear(candles, year):
+    """ Прежний MoexData.__popYear """
+    extracted = list()
+    while len(candles) > 0 and candles[0].begin.year == year:
+        extracted.append(candles.pop(0))
+    return extracted
+
+
+def popSplit(count):
+    """ Секунд на прежнее разбиение count свечей по годам """
+    candles = list(iterMinutes(BEGIN, BEGIN + timedelta(minutes=count)))
+    begin = time.perf_counter()
+    while candles:
+        popYear(candles, candles[0].begin.year)
+    return time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Линейность update")
+    parser.add_argument(
+        "-n", type=int, nargs="+", default=COUNTS,
+        help=f"количество свечей, по умолчанию {COUNTS}",
+        )
+    parser.add_argument(
+        "--storage", choices=list(STORAGES), default="bin",
+        help="формат хранения, по умолчанию bin",
+        )
+    args = parser.parse_args()
+    per_candle = list()
+    print(
+        f"{'CANDLES':>10}{'UPDATE, s':>11}{'us/candle':>11}"
+        f"{'pop(0), s':>11}"
+        )
+    for count in sorted(args.n):
+        seconds = update(args.storage, count)
+        old = popSplit(count)
+        per_candle.append(seconds / count * 1e6)
+        print(
+            f"{count:>10}{seconds:>11.2f}{per_candle[-1]:>11.1f}"
+            f"{old:>11.2f}"
+            )
+    growth = per_candle[-1] / per_candle[0]
+    status = "ok"
+    code = 0
+    if growth > MAX_GROWTH:
+        status = f"not linear, max {MAX_GROWTH}x"
+        code = 1
+    print(f"us/candle growth {growth:.1f}x  {status}")
+    return code
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
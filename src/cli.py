@@ -0,0 +1,317 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Консольный режим без GUI, для запуска по расписанию (cron)
+
+    python3 main.py download -l all -f 1m D --begin 2020 -j 8
+    python3 main.py update -t SBER GAZP -f 1m 10m --resume
+    python3 main.py resample -t SBER -f 5m 4h W
+    python3 main.py status -l all -f D
+    python3 main.py check --repair
+
+Модуль не импортирует PyQt6.
+"""
+
+import sys
+import logging
+import argparse
+from datetime import date
+from src.const import DOWNLOAD_JOBS, STORAGE, TIMEFRAMES, INTEGRITY_FILE
+from src.utils import Cmd
+from src.moex import MoexData
+from src.index import Index
+from src.scheduler import Scheduler
+from src.universe import Universe
+from src.integrity import Integrity
+logger = logging.getLogger("LOGGER")
+
+
+def createParser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Загрузка рыночных данных MOEX без GUI",
+        )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def addCommon(cmd):
+        cmd.add_argument(
+            "-t", "--tickers", nargs="+", default=list(),
+            help="тикеры, например: SBER GAZP",
+            )
+        cmd.add_argument(
+            "-l", "--list", dest="list_name",
+            help="имя списка акций из папки 'list', например: all",
+            )
+        cmd.add_argument(
+            "-f", "--timeframes", nargs="+", default=["1m"],
+            choices=TIMEFRAMES, help="таймфреймы, по умолчанию 1m",
+            )
+
+    def addJobs(cmd):
+        cmd.add_argument(
+            "-j", "--jobs", type=int, default=DOWNLOAD_JOBS,
+            help=f"количество параллельных задач, по умолчанию {DOWNLOAD_JOBS}",
+            )
+        cmd.add_argument(
+            "--resume", action="store_true",
+            help="продолжить прерванную загрузку",
+            )
+        cmd.add_argument(
+            "--storage", choices=("csv", "bin"), default=STORAGE,
+            help=f"формат хранения, по умолчанию {STORAGE}",
+            )
+
+    download = commands.add_parser("download", help="загрузить данные")
+    addCommon(download)
+    addJobs(download)
+    download.add_argument(
+        "--begin", type=int, default=None,
+        help="первый год, по умолчанию - с первой доступной даты",
+        )
+    download.add_argument(
+        "--end", type=int, default=date.today().year,
+        help="последний год, по умолчанию - текущий",
+        )
+
+    update = commands.add_parser("update", help="загрузить новые свечи")
+    addCommon(update)
+    addJobs(update)
+
+    resample = commands.add_parser(
+        "resample", help="построить таймфреймы из загруженных данных",
+        )
+    resample.add_argument(
+        "-t", "--tickers", nargs="+", default=list(),
+        help="тикеры, например: SBER GAZP",
+        )
+    resample.add_argument(
+        "-l", "--list", dest="list_name",
+        help="имя списка акций из папки 'list', например: all",
+        )
+    resample.add_argument(
+        "-f", "--timeframes", nargs="+", required=True,
+        help="таймфреймы: Nm, Nh, D, W, M, например: 5m 4h W",
+        )
+    resample.add_argument(
+        "--storage", choices=("csv", "bin"), default=STORAGE,
+        help=f"формат хранения, по умолчанию {STORAGE}",
+        )
+
+    status = commands.add_parser("status", help="показать загруженные данные")
+    addCommon(status)
+
+    check = commands.add_parser(
+        "check", help="проверить целостность загруженных данных",
+        )
+    check.add_argument(
+        "-t", "--tickers", nargs="+", default=list(),
+        help="тикеры, по умолчанию - все загруженные",
+        )
+    check.add_argument(
+        "-l", "--list", dest="list_name",
+        help="имя списка акций из папки 'list', например: all",
+        )
+    check.add_argument(
+        "-f", "--timeframes", nargs="+", default=list(),
+        help="таймфреймы, по умолчанию - все загруженные",
+        )
+    check.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="количество процессов, по умолчанию - число ядер",
+        )
+    check.add_argument(
+        "--repair", action="store_true",
+        help="перезагрузить года, в которых найдены проблемы",
+        )
+    check.add_argument(
+        "--gaps", action="store_true",
+        help="считать пропущенные торговые дни ошибкой и перезагружать их",
+        )
+    check.add_argument(
+        "--storage", choices=("csv", "bin"), default=STORAGE,
+        help=f"формат хранения при перезагрузке, по умолчанию {STORAGE}",
+        )
+    return parser
+
+
+def loadList(parser, name):
+    """ Список акций из папки 'list'
+    --
+    Общий список сначала обновляется с биржи, если он устарел (в GUI это
+    делает окно при запуске), при ошибке сети используется старый.
+    """
+    universe = Universe()
+    if name == Universe.GENERAL:
+        try:
+            universe.refresh(MoexData())
+        except Exception as err:
+            logger.warning(f"Failed to refresh shares list: {err}")
+    if not Cmd.isExist(universe.path(name)):
+        parser.error(
+            f"list '{name}' not found, available: {Universe.names()}"
+            )
+    return universe.load(name)
+
+
+def selectTickers(parser, args):
+    tickers = list(args.tickers)
+    if args.list_name is not None:
+        shares = loadList(parser, args.list_name)
+        tickers += [i["SECID"] for i in shares]
+    return list(dict.fromkeys(tickers))  # без повторов, порядок сохраняется
+
+
+def jobLogger(scheduler):
+    """ callback для Scheduler: задача, прогресс и ETA запуска """
+    metrics = scheduler.metrics
+
+    def onJobFinished(job, done, total, error):
+        status = "ok" if error is None else f"failed: {error}"
+        snapshot = metrics.snapshot()
+        logger.info(
+            f"  - [{snapshot['done']}/{snapshot['total']}] {job} {status} "
+            f"| {metrics.text()}"
+            )
+    return onJobFinished
+
+
+def logStats(md):
+    stats = md.http.stats()
+    logger.info(
+        f"ISS requests={stats['requests']} retries={stats['retries']} "
+        f"throttled={stats['throttled']} errors={stats['errors']} "
+        f"rate={stats['rate']:.1f}/s concurrency={stats['concurrency']}"
+        )
+
+
+def download(args, tickers):
+    md = MoexData(storage=args.storage)
+    scheduler = Scheduler(md, jobs=args.jobs)
+    failed = scheduler.download(
+        tickers, args.timeframes, args.begin, args.end,
+        callback=jobLogger(scheduler), resume=args.resume,
+        )
+    logStats(md)
+    return failed
+
+
+def update(args, tickers):
+    md = MoexData(storage=args.storage)
+    scheduler = Scheduler(md, jobs=args.jobs)
+    failed = scheduler.update(
+        tickers, args.timeframes,
+        callback=jobLogger(scheduler), resume=args.resume,
+        )
+    logStats(md)
+    return failed
+
+
+def resample(args, tickers):
+    md = MoexData(storage=args.storage)
+    failed = list()
+    for ticker in tickers:
+        for timeframe in args.timeframes:
+            try:
+                md.resample(ticker, timeframe)
+            except Exception as err:
+                logger.error(f"Resample {ticker}-{timeframe} failed: {err}")
+                failed.append(f"{ticker}-{timeframe}")
+    return failed
+
+
+def status(args, tickers):
+    index = Index()
+    print(f"{'TICKER':<10}{'TF':<5}{'FIRST':<18}{'LAST':<18}{'COUNT':>10}")
+    for ticker in tickers:
+        for timeframe in args.timeframes:
+            info = index.info(ticker, timeframe)
+            if info is None:
+                print(f"{ticker:<10}{timeframe:<5}{'None':<18}{'None':<18}"
+                      f"{0:>10}")
+                continue
+            first = info["first"].strftime("%Y-%m-%d %H:%M")
+            last = info["last"].strftime("%Y-%m-%d %H:%M")
+            print(f"{ticker:<10}{timeframe:<5}{first:<18}{last:<18}"
+                  f"{info['count']:>10}")
+
+
+def problems(report, gaps):
+    """ Проблемы отчета, влияющие на код завершения и --repair
+    --
+    День без сделок в неликвидной бумаге - тоже пропуск, перезагрузка
+    его не исправит, поэтому gap учитывается только с --gaps.
+    """
+    return [i for i in report.issues if gaps or i.kind != "gap"]
+
+
+def check(args, tickers):
+    """ Проверяет данные, возвращает проблемы, оставшиеся после --repair """
+    md = MoexData(storage=args.storage)
+    # без календаря праздники выглядят как пропуски
+    md.calendar.refresh(md)
+    integrity = Integrity(md.calendar, jobs=args.jobs)
+    report = integrity.scan(tickers, args.timeframes)
+    integrity.save(report)
+    for issue in report.issues:
+        print(issue)
+    issues = problems(report, args.gaps)
+    if not args.repair or len(issues) == 0:
+        return issues
+    scheduler = Scheduler(md)
+    failed = scheduler.repair(
+        report, callback=jobLogger(scheduler), gaps=args.gaps
+        )
+    logStats(md)
+    if len(failed) > 0:
+        return failed
+    report = integrity.scan(tickers, args.timeframes)
+    integrity.save(report)
+    return problems(report, args.gaps)
+
+
+def configConsoleLogger(name: str) -> None:
+    logger = logging.getLogger(name)
+    formatter = logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+        )
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def cli(argv) -> int:
+    """ Выполняет команду, возвращает код завершения """
+    parser = createParser()
+    args = parser.parse_args(argv)
+    configConsoleLogger("LOGGER")
+    tickers = selectTickers(parser, args)
+    if args.command == "check":
+        issues = check(args, tickers)
+        if len(issues) > 0:
+            logger.error(f"{len(issues)} problems, see {INTEGRITY_FILE}")
+            return 1
+        logger.info("Complete!")
+        return 0
+    if len(tickers) == 0:
+        parser.error("no tickers, use --tickers or --list")
+    if args.command == "status":
+        status(args, tickers)
+        return 0
+    commands = {"download": download, "update": update, "resample": resample}
+    failed = commands[args.command](args, tickers)
+    if len(failed) > 0:
+        logger.error(f"{len(failed)} jobs failed: "
+                     f"{', '.join(str(i) for i in failed)}")
+        return 1
+    logger.info("Complete!")
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(cli(sys.argv[1:]))
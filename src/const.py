@@ -13,6 +13,46 @@ LIST_DIR =          os.path.join(ROOT_DIR, "list")
 RES_DIR =           os.path.join(ROOT_DIR, "res")
 LOG_DIR =           os.path.join(ROOT_DIR, "log")
 LOG_FILE =          os.path.join(LOG_DIR,  "debug.log")
+INDEX_FILE =        os.path.join(DOWNLOAD_DIR, "index.db")
+JOURNAL_FILE =      os.path.join(DOWNLOAD_DIR, "journal.db")
+UNIVERSE_FILE =     os.path.join(DOWNLOAD_DIR, "universe.json")
+FIRST_DATE_FILE =   os.path.join(DOWNLOAD_DIR, "first.db")
+CALENDAR_FILE =     os.path.join(DOWNLOAD_DIR, "calendar.json")
+INTEGRITY_FILE =    os.path.join(DOWNLOAD_DIR, "integrity.json")
+METRICS_DIR =       os.path.join(DOWNLOAD_DIR, "metrics")
+
+# Logging
+# уровни логгеров по модулям, LOGGER - общий логгер программы, остальные
+# его дочерние логгеры. Частые вызовы (Cmd, элементы GUI) не форматируют
+# и не пишут сообщения, пока их уровень выше DEBUG
+LOG_LEVELS = {
+    "LOGGER":       "DEBUG",
+    "LOGGER.utils": "INFO",
+    "LOGGER.gui":   "INFO",
+    }
+
+# Download
+TIMEFRAMES =        ("1m", "10m", "1h", "D", "W", "M")
+DOWNLOAD_JOBS =     4  # количество параллельных задач загрузки
+JOB_WORKERS =       3  # фоновых задач GUI одновременно, см. src.jobs
+STORAGE =           "csv"  # формат хранения данных: "csv" или "bin"
+LOCAL_TIMEFRAMES =  ("W", "M")  # строятся из загруженных D, без запросов
+UNIVERSE_TTL =      timedelta(days=1)  # срок жизни списка всех акций
+CALENDAR_TTL =      timedelta(days=1)  # срок жизни торгового календаря
+CALENDAR_INDEX =    "IMOEX"  # по его дневным свечам - история торговых дней
+
+# Network
+ISS_URL =           "https://iss.moex.com/iss"
+HTTP_POOL_SIZE =    10  # соединений в пуле keep-alive
+HTTP_HOST_LIMIT =   8  # одновременных запросов к одному хосту
+HTTP_KEEPALIVE =    30  # сек, простаивающее соединение закрывается
+HTTP_TIMEOUT =      60  # сек, таймаут запроса
+HTTP_RETRIES =      5  # повторов при 429 / 5xx / таймауте
+HTTP_BACKOFF =      0.5  # сек, базовая задержка повтора, растет x2
+HTTP_BACKOFF_MAX =  30  # сек, максимальная задержка повтора
+REQUEST_RATE =      10  # запросов в секунду на старте, дальше адаптивно
+REQUEST_RATE_MIN =  1
+REQUEST_RATE_MAX =  50
 
 # Date & time
 UTC =               timezone.utc
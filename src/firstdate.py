@@ -0,0 +1,107 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Даты первых свечей
+
+Дата первой свечи (дата начала торгов) не меняется, поэтому она
+запрашивается у биржи один раз и хранится в FIRST_DATE_FILE (SQLite).
+Неизвестные тикеры запрашиваются параллельно в пуле потоков, частоту
+запросов регулирует HTTP сессия MoexData (см. src.session). Если данных
+по тикеру нет (None), результат не сохраняется - тикер будет запрошен
+снова в следующий раз.
+
+    first_dates = FirstDates()
+    first_dates.cached(["SBER", "GAZP"])  # только из кэша, без сети
+    first_dates.get(moex, ["SBER", "GAZP"])  # кэш + запросы недостающих
+"""
+
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.const import FIRST_DATE_FILE, DOWNLOAD_JOBS
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+
+class FirstDates():
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS first_dates (
+            ticker      TEXT NOT NULL,
+            timeframe   TEXT NOT NULL,
+            first       TEXT NOT NULL,
+            PRIMARY KEY (ticker, timeframe)
+            )
+        """
+
+    def __init__(self, path=FIRST_DATE_FILE):
+        logger.debug(f"{self.__class__.__name__}.__init__({path})")
+        Cmd.createDirs(Cmd.dirPath(path))
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        with self.__conn:
+            self.__conn.execute(self.SCHEMA)
+
+    def cached(self, tickers, timeframe="1m") -> dict:
+        """ Даты из кэша: {ticker: datetime}, неизвестных тикеров нет """
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT ticker, first FROM first_dates WHERE timeframe = ?",
+                (timeframe, ),
+                ).fetchall()
+        tickers = set(tickers)
+        return {
+            ticker: datetime.fromisoformat(first)
+            for ticker, first in rows if ticker in tickers
+            }
+
+    def save(self, ticker, timeframe, dt):
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO first_dates VALUES (?, ?, ?)",
+                (ticker, timeframe, dt.isoformat()),
+                )
+
+    def get(
+            self, moex, tickers, timeframe="1m",
+            jobs=DOWNLOAD_JOBS, callback=None,
+            ) -> dict:
+        """ Даты первых свечей {ticker: datetime | None}
+        --
+        Тикеры из кэша сети не трогают, остальные запрашиваются
+        параллельно в jobs потоках.
+        callback(ticker, dt) - вызывается в потоке, запустившем get,
+        для каждого запрошенного у биржи тикера.
+        """
+        dates = self.cached(tickers, timeframe)
+        unknown = [i for i in dict.fromkeys(tickers) if i not in dates]
+        if len(unknown) == 0:
+            return dates
+        logger.info(f"Request first date for {len(unknown)} tickers")
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {
+                pool.submit(moex.getFirstDatetime, ticker, timeframe): ticker
+                for ticker in unknown
+                }
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    dt = future.result()
+                except Exception as err:
+                    logger.error(f"Failed to get first date {ticker}: {err}")
+                    dt = None
+                if dt is not None:
+                    self.save(ticker, timeframe, dt)
+                dates[ticker] = dt
+                if callback is not None:
+                    callback(ticker, dt)
+        return dates
+
+
+
+if __name__ == "__main__":
+    ...
@@ -3,28 +3,53 @@
 # AUTHOR:       Alex Avin
 # E-MAIL:       mr.alexavin@gmail.com
 
-""" Doc """
+""" Doc
+Консоль лога в окне программы
+
+Handler только складывает отформатированные строки в буфер (из любого
+потока), ConsoleWidget забирает их по таймеру FLUSH_INTERVAL и
+добавляет в QPlainTextEdit одним блоком. Так поток сообщений при
+большой загрузке не блокирует UI: одна вставка и одна прокрутка на
+пачку строк вместо сигнала, вставки и прокрутки на каждую строку.
+В консоли хранится не больше MAX_LINES строк, старые удаляются.
+"""
 import logging
+import threading
+from collections import deque
 from datetime import datetime, date, time
 from PyQt6 import QtCore, QtGui, QtWidgets
 from PyQt6.QtCore import Qt
 from src.gui.custom import Palette, Font
-logger = logging.getLogger("LOGGER")
+logger = logging.getLogger("LOGGER.gui")
 
-class Handler(logging.StreamHandler, QtCore.QObject):
-    message = QtCore.pyqtSignal(str)
-
-    def __init__(self, parent=None):
-        logging.StreamHandler.__init__(self)
-        QtCore.QObject.__init__(self, parent)
+class Handler(logging.Handler):
+    def __init__(self, max_lines):
+        logging.Handler.__init__(self)
+        self.__lines = deque(maxlen=max_lines)
+        self.__lines_lock = threading.Lock()
+        self.__dropped = 0
 
     def emit(self, record):
         msg = self.format(record)
-        self.message.emit(msg)
-        self.flush()
+        with self.__lines_lock:
+            if len(self.__lines) == self.__lines.maxlen:
+                self.__dropped += 1  # все равно не поместится в консоль
+            self.__lines.append(msg)
+
+    def take(self):
+        """ Забирает накопленные строки и число пропущенных """
+        with self.__lines_lock:
+            lines = list(self.__lines)
+            dropped = self.__dropped
+            self.__lines.clear()
+            self.__dropped = 0
+        return lines, dropped
 
 
 class ConsoleWidget(QtWidgets.QTabWidget):
+    FLUSH_INTERVAL = 100  # ms, период вывода накопленных строк
+    MAX_LINES = 5000  # строк в консоли
+
     def __init__(self, parent=None):
         QtWidgets.QTabWidget.__init__(self, parent)
         self.__config()
@@ -36,38 +61,48 @@ class ConsoleWidget(QtWidgets.QTabWidget):
         logger.info("For more details visit http://alexavin.blog ")
 
     def __config(self):
-        logger.debug(f"{self.__class__.__name__}.__config()")
+        logger.debug("%s.__config()", self.__class__.__name__)
         self.setContentsMargins(0, 0, 0, 0)
         self.setFont(Font.MONO)
         self.setMaximumHeight(140)
 
     def __createHandler(self):
-        logger.debug(f"{self.__class__.__name__}.__createTester()")
-        self.handler = Handler(self)
+        logger.debug("%s.__createTester()", self.__class__.__name__)
+        self.handler = Handler(self.MAX_LINES)
         formatter = logging.Formatter(
             "%(asctime)s [%(levelname)s] %(message)s",
             datefmt="%H:%M:%S"
             )
         self.handler.setFormatter(formatter)
         self.handler.setLevel(logging.INFO)
-        logger.addHandler(self.handler)
+        # общий логгер программы, а не LOGGER.gui - в консоль
+        # попадают сообщения всех модулей
+        logging.getLogger("LOGGER").addHandler(self.handler)
 
     def __createWidgets(self):
-        logger.debug(f"{self.__class__.__name__}.__createWidgets()")
+        logger.debug("%s.__createWidgets()", self.__class__.__name__)
         self.console = QtWidgets.QPlainTextEdit()
+        self.console.setMaximumBlockCount(self.MAX_LINES)
+        self.timer = QtCore.QTimer(self)
         self.addTab(self.console, "Log")
 
     def __connect(self):
-        logger.debug(f"{self.__class__.__name__}.__connect()")
-        self.handler.message.connect(self.__updateText)
+        logger.debug("%s.__connect()", self.__class__.__name__)
+        self.timer.timeout.connect(self.__updateText)
+        self.timer.start(self.FLUSH_INTERVAL)
 
     def __scrollDown(self):
         scroll_bar = self.console.verticalScrollBar()
         end_text = scroll_bar.maximum()
         scroll_bar.setValue(end_text)
 
-    def __updateText(self, msg):
-        self.console.appendPlainText(msg)
+    def __updateText(self):
+        lines, dropped = self.handler.take()
+        if len(lines) == 0:
+            return
+        if dropped > 0:
+            lines.insert(0, f"... {dropped} lines skipped")
+        self.console.appendPlainText("\n".join(lines))
         self.__scrollDown()
 
 
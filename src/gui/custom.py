@@ -9,7 +9,7 @@ from PyQt6 import QtCore, QtGui, QtWidgets
 from PyQt6.QtCore import Qt
 from src.utils import Cmd
 from src.const import RES_DIR
-logger = logging.getLogger("LOGGER")
+logger = logging.getLogger("LOGGER.gui")
 
 class GuiError(Exception): pass
 
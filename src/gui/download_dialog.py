@@ -4,198 +4,109 @@
 # E-MAIL:       mr.alexavin@gmail.com
 
 
-import enum
 import logging
 from datetime import date, time, timedelta, datetime
 from PyQt6 import QtCore, QtGui, QtWidgets
 from PyQt6.QtCore import Qt
-from src.const import LIST_DIR
 from src.moex import MoexData
-from src.gui.custom import Palette, Font, Icon, ToolButton, HLine, Dialog
+from src.scheduler import Scheduler
+from src.universe import Universe
+from src.firstdate import FirstDates
+from src.jobs import JobManager, Priority, State
+from src.gui.custom import (
+    Palette, Font, Icon, ToolButton, HLine, Dialog, ProgressBar,
+    )
 from src.gui.console import ConsoleWidget
-from src.utils import Cmd
-logger = logging.getLogger("LOGGER")
-
-class TGetFirsDate(QtCore.QThread):
-    def __init__(self, moex, tree, parent=None):
-        QtCore.QThread.__init__(self, parent)
-        self.moex = moex
-        self.tree = tree
-
-    def run(self):
-        logger.info(f":: Receiving first date")
-        for i in self.tree:
-            ticker = i.ticker
-            dt = self.moex.getFirstDatetime(ticker)
-            if dt is not None:
-                dt = dt.strftime("%Y-%m-%d %H:%M")
-                i.setText(Tree.Column.FIRST_DATE, dt)
-                logger.info(f"  - received first date for {ticker} -> {dt}")
-            else:
-                i.setText(Tree.Column.FIRST_DATE, "None")
-        logger.info(f"Receive complete!")
-
-
-class TGetLastDate(QtCore.QThread):
-    def __init__(self, moex, tree, parent=None):
-        QtCore.QThread.__init__(self, parent)
-        self.moex = moex
-        self.tree = tree
-
-    def run(self):
-        logger.info(f":: Checkin last date")
-        for i in self.tree:
-            ticker = i.ticker
-            dt = self.moex.getLastDatetime(ticker)
-            if dt is not None:
-                dt = dt.strftime("%Y-%m-%d %H:%M")
-                i.setText(Tree.Column.LAST_DATE, dt)
-                i.setCheckState(Tree.Column.SECID, Qt.CheckState.Checked)
-            else:
-                i.setText(Tree.Column.LAST_DATE, "None")
-        logger.info(f"Chekin complete!")
-
-
-class TDownload(QtCore.QThread):
-    def __init__(self, moex, shares, timeframe_list, begin, end, parent=None):
-        QtCore.QThread.__init__(self, parent)
-        self.moex = moex
-        self.shares = shares
-        self.timeframe_list = timeframe_list
-        self.begin = begin
-        self.end = end
-
-    def run(self):
-        logger.info(f":: Start download data")
-        for i in self.shares:
-            for timeframe in self.timeframe_list:
-                ticker = i.ticker
-                if self.begin is None:
-                    self.begin = self.moex.getFirstDatetime(ticker).year
-                year = self.begin
-                while year <= self.end:
-                    self.moex.download(ticker, timeframe, year)
-                    year += 1
-        logger.info(f"Download complete!")
-
-
-class TUpdate(QtCore.QThread):
-    def __init__(self, moex, shares, timeframe_list, parent=None):
-        QtCore.QThread.__init__(self, parent)
-        self.moex = moex
-        self.shares = shares
-        self.timeframe_list = timeframe_list
-
-    def run(self):
-        logger.info(f":: Start update data")
-        for i in self.shares:
-            for timeframe in self.timeframe_list:
-                ticker = i.ticker
-                self.moex.update(ticker, timeframe)
-        logger.info(f"Update complete!")
-
-
-class TDelete(QtCore.QThread):
-    def __init__(self, moex, parent=None):
-        QtCore.QThread.__init__(self, parent)
-        self.moex = moex
-
-    def run(self):
-        logger.info(f":: Delete moex data")
-        self.moex.deleteMoexData()
-        logger.info(f"Delete complete!")
-
-
-class IShare(QtWidgets.QTreeWidgetItem):
-    def __init__(self, dct, parent=None):
-        logger.debug(f"{self.__class__.__name__}.__init__()")
-        QtWidgets.QTreeWidgetItem.__init__(self, parent)
-        self.setFlags(
-            Qt.ItemFlag.ItemIsUserCheckable |
-            Qt.ItemFlag.ItemIsSelectable |
-            Qt.ItemFlag.ItemIsEnabled
-            )
-        self.setCheckState(0, Qt.CheckState.Unchecked)
-        self.setText(Tree.Column.SECID,     str(dct["SECID"]))
-        self.setText(Tree.Column.SECNAME,   str(dct["SECNAME"]))
+from src.gui.share_table import ShareTable
+from src.gui.jobs_widget import JobSignals, JobsWidget
+logger = logging.getLogger("LOGGER.gui")
 
-    @property  #ticker
-    def ticker(self):
-        logger.debug(f"{self.__class__.__name__}.ticker")
-        return self.text(Tree.Column.SECID)
+def getFirstDates(task, md, first_dates, tickers, model):
+    logger.info(f":: Receiving first date")
+    done = 0
 
+    def onReceived(ticker, dt):
+        nonlocal done
+        done += 1
+        model.setFirstDate(ticker, dt)
+        task.setProgress(done, len(tickers))
 
-class Tree(QtWidgets.QTreeWidget):
-    class Column(enum.IntEnum):
-        SECID =                 enum.auto(0),
-        SECNAME =               enum.auto(),
-        FIRST_DATE =            enum.auto(),
-        LAST_DATE =             enum.auto(),
+    first_dates.get(md, tickers, callback=onReceived)
+    logger.info(f"Receive complete!")
 
-    def __init__(self, parent=None):
-        logger.debug(f"{self.__class__.__name__}.__init__()")
-        QtWidgets.QTreeWidget.__init__(self, parent)
-        self.__config()
 
-    def __iter__(self):
-        logger.debug(f"{self.__class__.__name__}.__iter__()")
-        all_items = list()
-        for i in range(self.topLevelItemCount()):
-            item = self.topLevelItem(i)
-            all_items.append(item)
-        return iter(all_items)
+def getLastDates(task, md, tickers, model):
+    logger.info(f":: Checkin last date")
+    for n, ticker in enumerate(tickers, 1):
+        task.checkpoint()
+        dt = md.getLastDatetime(ticker)
+        model.setLastDate(ticker, dt)
+        if dt is not None:
+            model.setChecked(ticker)
+        task.setProgress(n, len(tickers))
+    logger.info(f"Chekin complete!")
+
+
+def createScheduler(task, md):
+    """ Scheduler задачи, прогресс, ETA и скорость запуска - в task """
+    def onMetrics(metrics):
+        snapshot = metrics.snapshot()
+        task.setProgress(snapshot["done"], snapshot["total"], metrics.text())
+
+    scheduler = Scheduler(md, checkpoint=task.checkpoint)
+    scheduler.metrics.subscribe(onMetrics)
+    return scheduler
+
+
+def download(task, md, tickers, timeframe_list, begin, end, resume):
+    logger.info(f":: Start download data")
+    scheduler = createScheduler(task, md)
+    scheduler.download(tickers, timeframe_list, begin, end, resume=resume)
+    logger.info(f"Download complete!")
+
+
+def update(task, md, tickers, timeframe_list, resume):
+    logger.info(f":: Start update data")
+    scheduler = createScheduler(task, md)
+    scheduler.update(tickers, timeframe_list, resume=resume)
+    logger.info(f"Update complete!")
 
-    def __config(self):
-        logger.debug(f"{self.__class__.__name__}.__config()")
-        labels = list()
-        for l in self.Column:
-            labels.append(l.name)
-        self.setHeaderLabels(labels)
-        self.setSortingEnabled(True)
-        self.sortByColumn(Tree.Column.SECID, Qt.SortOrder.AscendingOrder)
-        self.setFont(Font.MONO)
-        self.setColumnWidth(Tree.Column.SECID, 100)
-        self.setColumnWidth(Tree.Column.SECNAME, 250)
-        self.setColumnWidth(Tree.Column.FIRST_DATE, 150)
-        self.setColumnWidth(Tree.Column.LAST_DATE, 150)
-        self.setMinimumWidth(700)
-
-    def getSelected(self):
-        logger.debug(f"{self.__class__.__name__}.getSelected()")
-        selected = list()
-        for i in self:
-            if i.checkState(Tree.Column.SECID) == Qt.CheckState.Checked:
-                selected.append(i)
-        return selected
-
-    def setSharesList(self, slist):
-        logger.debug(f"{self.__class__.__name__}.setSharesList()")
-        for i in slist:
-            item = IShare(i)
-            self.addTopLevelItem(item)
+
+def refreshSharesList(task, md, universe):
+    universe.refresh(md)
 
 
 class DownloadDialog(QtWidgets.QDialog):
     def __init__(self, parent=None):
-        logger.debug(f"{self.__class__.__name__}.__init__()")
+        logger.debug("%s.__init__()", self.__class__.__name__)
         QtWidgets.QDialog.__init__(self, parent)
+        # один MoexData на все задачи: общий пул соединений и общий
+        # лимит частоты запросов к ISS, один индекс и календарь
+        self.moex = MoexData()
+        self.jobs = JobManager()
+        self.job_signals = JobSignals(self.jobs, self)
+        self.list_task = None
         self.__config()
         self.__createWidgets()
         self.__createLayots()
         self.__configSpinBox()
         self.__connect()
+        self.universe = Universe()
+        self.first_dates = FirstDates()
         self.__checkGeneralSharesList()
         self.__loadSharesList()
         self.__initUI()
-        self.thread = None
 
     def __config(self):
-        logger.debug(f"{self.__class__.__name__}.__config()")
+        logger.debug("%s.__config()", self.__class__.__name__)
         self.setWindowFlags(QtCore.Qt.WindowType.FramelessWindowHint)
 
     def __createWidgets(self):
-        logger.debug(f"{self.__class__.__name__}.__createWidgets()")
-        self.tree = Tree(self)
+        logger.debug("%s.__createWidgets()", self.__class__.__name__)
+        self.tree = ShareTable(self)
+        self.filter = QtWidgets.QLineEdit(self)
+        self.filter.setPlaceholderText("Filter")
+        self.filter.setClearButtonEnabled(True)
         self.btn_close = ToolButton(Icon.CLOSE)
         self.combobox_list = QtWidgets.QComboBox(self)
         self.btn_download = QtWidgets.QPushButton("Download")
@@ -203,6 +114,7 @@ class DownloadDialog(QtWidgets.QDialog):
         self.btn_first = QtWidgets.QPushButton("Refresh", self)
         self.btn_last = QtWidgets.QPushButton("Refresh", self)
         self.first_availible = QtWidgets.QCheckBox("From first availible")
+        self.resume = QtWidgets.QCheckBox("Resume interrupted")
         self.begin_year = QtWidgets.QSpinBox(self)
         self.end_year = QtWidgets.QSpinBox(self)
         self.checkbox_1M = QtWidgets.QCheckBox("1M", self)
@@ -219,9 +131,13 @@ class DownloadDialog(QtWidgets.QDialog):
             "the 'Update' button:"
             )
         self.log = ConsoleWidget(self)
+        self.jobs_widget = JobsWidget(self.jobs, self.job_signals, self)
+        self.log.addTab(self.jobs_widget, "Jobs")
+        self.progress = ProgressBar(self)
+        self.progress.setFormat("")
 
     def __createLayots(self):
-        logger.debug(f"{self.__class__.__name__}.__createLayots()")
+        logger.debug("%s.__createLayots()", self.__class__.__name__)
         hbox_top_btn = QtWidgets.QHBoxLayout()
         hbox_top_btn.addStretch()
         hbox_top_btn.addWidget(self.btn_close)
@@ -245,19 +161,22 @@ class DownloadDialog(QtWidgets.QDialog):
         form.addRow("Begin",            self.begin_year)
         form.addRow("End",              self.end_year)
         form.addRow(                    timeframes)
+        form.addRow(                    self.resume)
         form.addRow(                    self.btn_download)
         form.addRow(                    self.info_label)
         form.addRow(                    self.btn_update)
         vbox = QtWidgets.QVBoxLayout()
+        vbox.addWidget(self.filter)
         vbox.addWidget(self.tree)
         vbox.addWidget(self.log)
+        vbox.addWidget(self.progress)
         hbox = QtWidgets.QHBoxLayout()
         hbox.addLayout(vbox)
         hbox.addLayout(form)
         self.setLayout(hbox)
 
     def __configSpinBox(self):
-        logger.debug(f"{self.__class__.__name__}.__configSpinBox()")
+        logger.debug("%s.__configSpinBox()", self.__class__.__name__)
         self.setWindowTitle("Download Tinkoff data")
         now_year = date.today().year
         first_year = 1997
@@ -269,47 +188,53 @@ class DownloadDialog(QtWidgets.QDialog):
         self.end_year.setValue(now_year)
 
     def __connect(self):
-        logger.debug(f"{self.__class__.__name__}.__connect()")
+        logger.debug("%s.__connect()", self.__class__.__name__)
         self.btn_close.clicked.connect(self.__onClose)
         self.combobox_list.currentTextChanged.connect(self.__updateTree)
+        self.filter.textChanged.connect(self.tree.setFilter)
         self.btn_first.clicked.connect(self.__onRefreshFirstDate)
         self.btn_last.clicked.connect(self.__onRefreshLastDate)
         self.first_availible.clicked.connect(self.__onCheckFirstAvailible)
         self.btn_download.clicked.connect(self.__onDownload)
         self.btn_update.clicked.connect(self.__onUpdate)
+        self.job_signals.changed.connect(self.__onJobChanged)
 
     def __checkGeneralSharesList(self):
-        logger.debug(f"{self.__class__.__name__}.__checkGeneralSharesList()")
-        if not Cmd.isExist(LIST_DIR):
-            Cmd.createDirs(LIST_DIR)
-        path = Cmd.join(LIST_DIR, "all.json")
-        if not Cmd.isExist(path):
-            md = MoexData()
-            full_list = md.getAllShares()
-            MoexData.saveSharesList(full_list, "all")
+        logger.debug("%s.__checkGeneralSharesList()", self.__class__.__name__)
+        if self.universe.isExpired():
+            # список обновляется в фоне, окно не ждет сеть
+            self.list_task = self.jobs.submit(
+                "Refresh shares list", refreshSharesList,
+                self.moex, self.universe,
+                priority=Priority.HIGH,
+                )
 
     def __loadSharesList(self):
-        logger.debug(f"{self.__class__.__name__}.__loadAssetLists()")
-        files = Cmd.getFiles(LIST_DIR, full_path=False)
-        for file in files:
-            name = Cmd.name(file)
-            self.combobox_list.addItem(name)
+        logger.debug("%s.__loadAssetLists()", self.__class__.__name__)
+        current = self.combobox_list.currentText()
+        self.combobox_list.blockSignals(True)
+        self.combobox_list.clear()
+        self.combobox_list.addItems(self.universe.names())
+        if current:
+            self.combobox_list.setCurrentText(current)
+        self.combobox_list.blockSignals(False)
+        self.__updateTree()
 
     def __initUI(self):
-        logger.debug(f"{self.__class__.__name__}.__initUI()")
+        logger.debug("%s.__initUI()", self.__class__.__name__)
         self.first_availible.setChecked(True)
         self.begin_year.setEnabled(False)
         self.checkbox_1M.setChecked(True)
 
     def __getSelectedShares(self):
-        logger.debug(f"{self.__class__.__name__}.__getSelectedShares()")
-        shares_items = self.tree.getSelected()
-        if len(shares_items) == 0:
+        logger.debug("%s.__getSelectedShares()", self.__class__.__name__)
+        tickers = self.tree.getSelected()
+        if len(tickers) == 0:
             logger.warning(f"No selected shares")
-        return shares_items
+        return tickers
 
     def __getSelectedTimeframes(self):
-        logger.debug(f"{self.__class__.__name__}.__getSelectedTimeframes()")
+        logger.debug("%s.__getSelectedTimeframes()", self.__class__.__name__)
         tf_list = list()
         if self.checkbox_1M.isChecked(): tf_list.append("1m")
         if self.checkbox_10M.isChecked(): tf_list.append("10m")
@@ -322,44 +247,67 @@ class DownloadDialog(QtWidgets.QDialog):
         return tf_list
 
     def __getBeginYear(self):
-        logger.debug(f"{self.__class__.__name__}.__getBeginYear()")
+        logger.debug("%s.__getBeginYear()", self.__class__.__name__)
         if self.first_availible.isChecked():
             return None
         else:
             return self.begin_year.value()
 
     def __getEndYear(self):
-        logger.debug(f"{self.__class__.__name__}.__getEndYear()")
+        logger.debug("%s.__getEndYear()", self.__class__.__name__)
         return self.end_year.value()
 
-    @QtCore.pyqtSlot()  #__threadFinished
-    def __threadFinished(self):
-        logger.debug(f"{self.__class__.__name__}.__threadFinished()")
-        self.thread = None
-        self.btn_download.setEnabled(True)
-        self.btn_update.setEnabled(True)
+    def __showProgress(self, task):
+        """ Прогресс-бар показывает задачу загрузки или обновления """
+        if task.state == State.QUEUED:
+            return  # ждет, пока идет другая задача с данными
+        if task.state in task.FINISHED:
+            if task.state == State.DONE:
+                self.progress.setValue(100)
+            self.progress.setFormat(f"{task.state.value} {task.status}")
+            return
+        value = int(100 * task.done / task.total) if task.total else 0
+        self.progress.setValue(value)
+        self.progress.setFormat(
+            f"%p% {task.done}/{task.total} {task.status}"
+            )
+
+    @QtCore.pyqtSlot(object)  #__onJobChanged
+    def __onJobChanged(self, task):
+        if task.resource == "data":
+            self.__showProgress(task)
+        if task is self.list_task and task.state in task.FINISHED:
+            self.list_task = None
+            if task.state == State.DONE:
+                self.__loadSharesList()
 
     @QtCore.pyqtSlot()  #__updateTree
     def __updateTree(self):
-        logger.debug(f"{self.__class__.__name__}.__updateTree()")
-        self.tree.clear()
+        logger.debug("%s.__updateTree()", self.__class__.__name__)
         list_name = self.combobox_list.currentText()
-        shares_list = MoexData.loadSharesList(list_name)
+        if list_name == "":
+            self.tree.setSharesList(list())
+            return
+        shares_list = self.universe.load(list_name)
         self.tree.setSharesList(shares_list)
+        model = self.tree.share_model
+        for ticker, dt in self.first_dates.cached(model.tickers()).items():
+            model.setFirstDate(ticker, dt)
 
     @QtCore.pyqtSlot()  #__onHelp
     def __onHelp(self):
-        logger.debug(f"{self.__class__.__name__}.__onHelp()")
+        logger.debug("%s.__onHelp()", self.__class__.__name__)
         ...
 
     @QtCore.pyqtSlot()  #__onClose
     def __onClose(self):
-        logger.debug(f"{self.__class__.__name__}.__onClose()")
+        logger.debug("%s.__onClose()", self.__class__.__name__)
+        self.jobs.cancelAll()
         QtWidgets.QApplication.instance().quit()
 
     @QtCore.pyqtSlot()  #__onCheckFirstAvailible
     def __onCheckFirstAvailible(self):
-        logger.debug(f"{self.__class__.__name__}.__onCheckFirstAvailible()")
+        logger.debug("%s.__onCheckFirstAvailible()", self.__class__.__name__)
         if self.first_availible.isChecked():
             self.begin_year.setEnabled(False)
         else:
@@ -367,31 +315,27 @@ class DownloadDialog(QtWidgets.QDialog):
 
     @QtCore.pyqtSlot()  #__onRefreshFirstDate
     def __onRefreshFirstDate(self):
-        logger.debug(f"{self.__class__.__name__}.__onRefreshFirstDate()")
-        if self.thread is not None:
-            Dialog.info(f"Data manager is busy now, wait for complete task")
-            return
-        md = MoexData()
-        self.thread = TGetFirsDate(md, self.tree)
-        self.thread.finished.connect(self.__threadFinished)
-        self.thread.start()
+        logger.debug("%s.__onRefreshFirstDate()", self.__class__.__name__)
+        self.jobs.submit(
+            "First date", getFirstDates, self.moex,
+            self.first_dates, self.tree.tickers(), self.tree.share_model,
+            priority=Priority.HIGH,
+            )
 
     @QtCore.pyqtSlot()  #__onRefreshLastDate
     def __onRefreshLastDate(self):
-        logger.debug(f"{self.__class__.__name__}.__onRefreshLastDate()")
-        if self.thread is not None:
-            Dialog.info(f"Data manager is busy now, wait for complete task")
-            return
-        md = MoexData()
-        self.thread = TGetLastDate(md, self.tree)
-        self.thread.finished.connect(self.__threadFinished)
-        self.thread.start()
+        logger.debug("%s.__onRefreshLastDate()", self.__class__.__name__)
+        self.jobs.submit(
+            "Last date", getLastDates, self.moex,
+            self.tree.tickers(), self.tree.share_model,
+            priority=Priority.HIGH,
+            )
 
     @QtCore.pyqtSlot()  #__onDownload
     def __onDownload(self):
-        logger.debug(f"{self.__class__.__name__}.__onDownload()")
-        shares = self.__getSelectedShares()
-        if len(shares) == 0:
+        logger.debug("%s.__onDownload()", self.__class__.__name__)
+        tickers = self.__getSelectedShares()
+        if len(tickers) == 0:
             Dialog.info("No selected shares\nChoose share before")
             return
         timeframe_list = self.__getSelectedTimeframes()
@@ -400,30 +344,30 @@ class DownloadDialog(QtWidgets.QDialog):
             return
         begin = self.__getBeginYear()
         end = self.__getEndYear()
-        md = MoexData()
-        self.thread = TDownload(md, shares, timeframe_list, begin, end)
-        self.thread.finished.connect(self.__threadFinished)
-        self.thread.start()
-        self.btn_download.setEnabled(False)
-        self.btn_update.setEnabled(False)
+        resume = self.resume.isChecked()
+        self.jobs.submit(
+            f"Download {len(tickers)} shares {' '.join(timeframe_list)}",
+            download, self.moex, tickers, timeframe_list, begin, end, resume,
+            resource="data",
+            )
 
     @QtCore.pyqtSlot()  #__onUpdate
     def __onUpdate(self):
-        logger.debug(f"{self.__class__.__name__}.__onUpdate()")
-        shares = self.__getSelectedShares()
-        if len(shares) == 0:
+        logger.debug("%s.__onUpdate()", self.__class__.__name__)
+        tickers = self.__getSelectedShares()
+        if len(tickers) == 0:
             Dialog.info("No selected shares\nChoose share before")
             return
         timeframe_list = self.__getSelectedTimeframes()
         if len(timeframe_list) == 0:
             Dialog.info("No selected timeframe\nChoose timeframe before")
             return
-        md = MoexData()
-        self.thread = TUpdate(md, shares, timeframe_list)
-        self.thread.finished.connect(self.__threadFinished)
-        self.thread.start()
-        self.btn_download.setEnabled(False)
-        self.btn_update.setEnabled(False)
+        resume = self.resume.isChecked()
+        self.jobs.submit(
+            f"Update {len(tickers)} shares {' '.join(timeframe_list)}",
+            update, self.moex, tickers, timeframe_list, resume,
+            priority=Priority.LOW, resource="data",
+            )
 
 
 
@@ -0,0 +1,135 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Список фоновых задач src.jobs в окне программы
+
+JobSignals переводит уведомления JobManager (приходят из потоков задач)
+в Qt сигнал changed(task), который доставляется в поток GUI.
+JobsWidget показывает задачи и управляет выбранной: пауза, продолжение,
+отмена.
+"""
+
+import enum
+import logging
+from PyQt6 import QtCore, QtWidgets
+from src.gui.custom import Font
+logger = logging.getLogger("LOGGER.gui")
+
+
+class JobSignals(QtCore.QObject):
+    changed = QtCore.pyqtSignal(object)
+
+    def __init__(self, manager, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        manager.subscribe(self.changed.emit)
+
+
+class JobsWidget(QtWidgets.QWidget):
+    class Column(enum.IntEnum):
+        ID =        0
+        JOB =       1
+        STATE =     2
+        PROGRESS =  3
+
+    def __init__(self, manager, signals, parent=None):
+        logger.debug("%s.__init__()", self.__class__.__name__)
+        QtWidgets.QWidget.__init__(self, parent)
+        self.manager = manager
+        self.rows = dict()  # task.id -> row
+        self.__createWidgets()
+        self.__createLayots()
+        self.__connect(signals)
+
+    def __createWidgets(self):
+        self.table = QtWidgets.QTableWidget(0, len(self.Column), self)
+        self.table.setHorizontalHeaderLabels([i.name for i in self.Column])
+        self.table.setFont(Font.MONO)
+        self.table.verticalHeader().hide()
+        self.table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+            )
+        self.table.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+            )
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(self.Column.ID, 40)
+        self.table.setColumnWidth(self.Column.JOB, 250)
+        self.btn_pause = QtWidgets.QPushButton("Pause", self)
+        self.btn_resume = QtWidgets.QPushButton("Resume", self)
+        self.btn_cancel = QtWidgets.QPushButton("Cancel", self)
+
+    def __createLayots(self):
+        vbox = QtWidgets.QVBoxLayout()
+        vbox.addWidget(self.btn_pause)
+        vbox.addWidget(self.btn_resume)
+        vbox.addWidget(self.btn_cancel)
+        vbox.addStretch()
+        hbox = QtWidgets.QHBoxLayout()
+        hbox.setContentsMargins(0, 0, 0, 0)
+        hbox.addWidget(self.table)
+        hbox.addLayout(vbox)
+        self.setLayout(hbox)
+
+    def __connect(self, signals):
+        signals.changed.connect(self.__onChanged)
+        self.btn_pause.clicked.connect(self.__onPause)
+        self.btn_resume.clicked.connect(self.__onResume)
+        self.btn_cancel.clicked.connect(self.__onCancel)
+
+    def __selectedTask(self):
+        row = self.table.currentRow()
+        if row < 0:
+            return None
+        task_id = int(self.table.item(row, self.Column.ID).text())
+        return self.manager.get(task_id)
+
+    @QtCore.pyqtSlot(object)  #__onChanged
+    def __onChanged(self, task):
+        row = self.rows.get(task.id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self.rows[task.id] = row
+            self.table.setItem(
+                row, self.Column.ID, QtWidgets.QTableWidgetItem(str(task.id))
+                )
+            self.table.setItem(
+                row, self.Column.JOB, QtWidgets.QTableWidgetItem(task.name)
+                )
+            self.table.setItem(
+                row, self.Column.STATE, QtWidgets.QTableWidgetItem()
+                )
+            self.table.setItem(
+                row, self.Column.PROGRESS, QtWidgets.QTableWidgetItem()
+                )
+        self.table.item(row, self.Column.STATE).setText(task.state.value)
+        progress = f"{task.done}/{task.total}" if task.total else ""
+        if task.status:
+            progress = f"{progress} {task.status}".strip()
+        self.table.item(row, self.Column.PROGRESS).setText(progress)
+
+    @QtCore.pyqtSlot()  #__onPause
+    def __onPause(self):
+        task = self.__selectedTask()
+        if task is not None:
+            task.pause()
+
+    @QtCore.pyqtSlot()  #__onResume
+    def __onResume(self):
+        task = self.__selectedTask()
+        if task is not None:
+            task.resume()
+
+    @QtCore.pyqtSlot()  #__onCancel
+    def __onCancel(self):
+        task = self.__selectedTask()
+        if task is not None:
+            task.cancel()
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,310 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Таблица инструментов: модель / представление
+
+ShareStore - данные списка в колонках: тикеры и названия в списках,
+даты в array('q') (ns от 1970-01-01), отметки в bytearray. Строка -
+индекс в колонках, Python объект на строку не создается.
+
+ShareModel - QAbstractTableModel над ShareStore. Методы setFirstDate,
+setLastDate, setChecked можно вызывать из любого потока: изменения
+складываются в буфер, модель применяет их в потоке GUI по таймеру
+FLUSH_INTERVAL и отправляет один dataChanged на колонку за раз.
+
+ShareTable - QTableView с ShareProxy (QSortFilterProxyModel): фильтр
+по тикеру и названию, сортировка по любой колонке (даты сортируются
+как даты). Сортирует сама модель одним вызовом sorted по колонке
+ShareStore - прокси только передает ей команду, иначе на каждое
+сравнение строк было бы два вызова data из C++ в Python.
+Список может быть любым списком инструментов с полями SECID, SECNAME.
+"""
+
+import enum
+import logging
+import threading
+from array import array
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtCore import Qt
+from src.storage import toEpochNs, fromEpochNs
+from src.gui.custom import Font
+logger = logging.getLogger("LOGGER.gui")
+
+
+class ShareStore():
+    UNKNOWN = -1  # дата еще не запрашивалась - пустая ячейка
+    NO_DATA = -2  # данных нет - 'None'
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def clear(self):
+        self.tickers = list()
+        self.names = list()
+        self.first = array("q")
+        self.last = array("q")
+        self.checked = bytearray()
+        self.rows = dict()  # ticker -> row
+
+    def extend(self, shares):
+        for i in shares:
+            ticker = str(i["SECID"])
+            if ticker in self.rows:
+                continue
+            self.rows[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            self.names.append(str(i["SECNAME"]))
+        count = len(self.tickers) - len(self.first)
+        self.first.extend([self.UNKNOWN] * count)
+        self.last.extend([self.UNKNOWN] * count)
+        self.checked.extend(bytes(count))
+
+    def reorder(self, order):
+        """ Переставляет строки: новая строка i - старая order[i] """
+        self.tickers = [self.tickers[i] for i in order]
+        self.names = [self.names[i] for i in order]
+        self.first = array("q", (self.first[i] for i in order))
+        self.last = array("q", (self.last[i] for i in order))
+        self.checked = bytearray(self.checked[i] for i in order)
+        self.rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+
+    @classmethod  #toValue
+    def toValue(cls, dt):
+        return cls.NO_DATA if dt is None else toEpochNs(dt)
+
+    @classmethod  #toText
+    def toText(cls, value):
+        if value == cls.UNKNOWN:
+            return ""
+        if value == cls.NO_DATA:
+            return "None"
+        return fromEpochNs(value).strftime("%Y-%m-%d %H:%M")
+
+
+class ShareModel(QtCore.QAbstractTableModel):
+    class Column(enum.IntEnum):
+        SECID =                 0
+        SECNAME =               1
+        FIRST_DATE =            2
+        LAST_DATE =             3
+
+    FLUSH_INTERVAL = 100  # ms, период применения изменений из потоков
+
+    def __init__(self, parent=None):
+        QtCore.QAbstractTableModel.__init__(self, parent)
+        self.store = ShareStore()
+        self.__pending = dict()  # (ticker, column) -> value
+        self.__pending_lock = threading.Lock()
+        self.__timer = QtCore.QTimer(self)
+        self.__timer.timeout.connect(self.__flush)
+        self.__timer.start(self.FLUSH_INTERVAL)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.Column)
+
+    def headerData(self, section, orientation, role):
+        if (
+                orientation == Qt.Orientation.Horizontal
+                and role == Qt.ItemDataRole.DisplayRole
+                ):
+            return self.Column(section).name
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+        if index.column() == self.Column.SECID:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+        store = self.store
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.Column.SECID:
+                return store.tickers[row]
+            if column == self.Column.SECNAME:
+                return store.names[row]
+            if column == self.Column.FIRST_DATE:
+                return store.toText(store.first[row])
+            return store.toText(store.last[row])
+        if role == Qt.ItemDataRole.CheckStateRole:
+            if column == self.Column.SECID:
+                if store.checked[row]:
+                    return Qt.CheckState.Checked
+                return Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if (
+                not index.isValid()
+                or index.column() != self.Column.SECID
+                or role != Qt.ItemDataRole.CheckStateRole
+                ):
+            return False
+        checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        self.store.checked[index.row()] = int(checked)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        store = self.store
+        keys = (store.tickers, store.names, store.first, store.last)[column]
+        new_order = sorted(
+            range(len(store)), key=keys.__getitem__,
+            reverse=order == Qt.SortOrder.DescendingOrder,
+            )
+        self.layoutAboutToBeChanged.emit()
+        new_rows = [0] * len(new_order)
+        for new, old in enumerate(new_order):
+            new_rows[old] = new
+        store.reorder(new_order)
+        old_list = self.persistentIndexList()
+        new_list = [
+            self.index(new_rows[i.row()], i.column()) for i in old_list
+            ]
+        self.changePersistentIndexList(old_list, new_list)
+        self.layoutChanged.emit()
+
+    def setSharesList(self, shares):
+        """ Заменяет список, ожидающие изменения старого списка
+        отбрасываются """
+        self.beginResetModel()
+        with self.__pending_lock:
+            self.__pending.clear()
+        self.store.clear()
+        self.store.extend(shares)
+        self.endResetModel()
+
+    def tickers(self):
+        return list(self.store.tickers)
+
+    def getSelected(self):
+        """ Отмеченные тикеры в порядке списка """
+        store = self.store
+        return [t for t, c in zip(store.tickers, store.checked) if c]
+
+    def __put(self, ticker, column, value):
+        # строка ищется в __flush, в потоке GUI - список мог смениться
+        with self.__pending_lock:
+            self.__pending[(ticker, column)] = value
+
+    def setFirstDate(self, ticker, dt):
+        """ Потокобезопасно, применяется в следующем __flush """
+        self.__put(ticker, self.Column.FIRST_DATE, ShareStore.toValue(dt))
+
+    def setLastDate(self, ticker, dt):
+        """ Потокобезопасно, применяется в следующем __flush """
+        self.__put(ticker, self.Column.LAST_DATE, ShareStore.toValue(dt))
+
+    def setChecked(self, ticker, checked=True):
+        """ Потокобезопасно, применяется в следующем __flush """
+        self.__put(ticker, self.Column.SECID, int(checked))
+
+    @QtCore.pyqtSlot()  #__flush
+    def __flush(self):
+        with self.__pending_lock:
+            if not self.__pending:
+                return
+            pending = self.__pending
+            self.__pending = dict()
+        store = self.store
+        columns = {
+            self.Column.SECID:      store.checked,
+            self.Column.FIRST_DATE: store.first,
+            self.Column.LAST_DATE:  store.last,
+            }
+        changed = dict()  # column -> [min row, max row]
+        for (ticker, column), value in pending.items():
+            row = store.rows.get(ticker)
+            if row is None:
+                continue
+            columns[column][row] = value
+            bounds = changed.setdefault(column, [row, row])
+            bounds[0] = min(bounds[0], row)
+            bounds[1] = max(bounds[1], row)
+        for column, (first, last) in changed.items():
+            role = (
+                Qt.ItemDataRole.CheckStateRole
+                if column == self.Column.SECID
+                else Qt.ItemDataRole.DisplayRole
+                )
+            self.dataChanged.emit(
+                self.index(first, column), self.index(last, column),
+                [role],
+                )
+
+
+class ShareProxy(QtCore.QSortFilterProxyModel):
+    """ Фильтр в прокси, сортировка в исходной модели """
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column < 0:
+            return
+        self.sourceModel().sort(column, order)
+
+
+class ShareTable(QtWidgets.QTableView):
+    def __init__(self, parent=None):
+        logger.debug("%s.__init__()", self.__class__.__name__)
+        QtWidgets.QTableView.__init__(self, parent)
+        self.share_model = ShareModel(self)
+        self.proxy = ShareProxy(self)
+        self.proxy.setSourceModel(self.share_model)
+        self.proxy.setFilterKeyColumn(-1)  # тикер и название
+        self.proxy.setFilterCaseSensitivity(
+            Qt.CaseSensitivity.CaseInsensitive
+            )
+        self.setModel(self.proxy)
+        self.__config()
+
+    def __config(self):
+        logger.debug("%s.__config()", self.__class__.__name__)
+        column = ShareModel.Column
+        self.setSortingEnabled(True)
+        self.sortByColumn(column.SECID, Qt.SortOrder.AscendingOrder)
+        self.setFont(Font.MONO)
+        self.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+            )
+        self.verticalHeader().hide()
+        self.verticalHeader().setDefaultSectionSize(
+            self.fontMetrics().height() + 4
+            )
+        self.setColumnWidth(column.SECID, 100)
+        self.setColumnWidth(column.SECNAME, 250)
+        self.setColumnWidth(column.FIRST_DATE, 150)
+        self.setColumnWidth(column.LAST_DATE, 150)
+        self.setMinimumWidth(700)
+
+    def setFilter(self, text):
+        self.proxy.setFilterFixedString(text)
+
+    def setSharesList(self, shares):
+        self.share_model.setSharesList(shares)
+        header = self.horizontalHeader()
+        self.proxy.sort(
+            header.sortIndicatorSection(), header.sortIndicatorOrder()
+            )
+
+    def tickers(self):
+        return self.share_model.tickers()
+
+    def getSelected(self):
+        return self.share_model.getSelected()
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,211 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Индекс загруженных данных
+
+Хранит в download/index.db (SQLite) по одной записи на каждый год
+ticker/timeframe: имя файла с данными, первая и последняя свеча,
+количество свечей. Если год записан в другом формате (csv / bin), запись
+года заменяется, поэтому год никогда не учитывается дважды. Позволяет
+узнать последнюю дату и последний файл для ticker/timeframe не читая
+файлы с данными и не сканируя папки.
+Запись в индекс выполняется в транзакции, поэтому после сбоя индекс
+остается в согласованном состоянии.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from src.const import DOWNLOAD_DIR, INDEX_FILE
+from src.utils import Cmd
+from src.storage import findStorage
+logger = logging.getLogger("LOGGER")
+
+
+class Index():
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            ticker      TEXT NOT NULL,
+            timeframe   TEXT NOT NULL,
+            year        INTEGER NOT NULL,
+            name        TEXT NOT NULL,
+            first       TEXT NOT NULL,
+            last        TEXT NOT NULL,
+            count       INTEGER NOT NULL,
+            PRIMARY KEY (ticker, timeframe, year)
+            )
+        """
+
+    INSERT = "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, path=INDEX_FILE):
+        logger.debug(f"{self.__class__.__name__}.__init__({path})")
+        Cmd.createDirs(Cmd.dirPath(path))
+        self.__lock = threading.Lock()
+        if not Cmd.isExist(path):
+            self.__build(path)
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        with self.__conn:
+            self.__conn.execute(self.SCHEMA)
+
+    def __filePath(self, ticker, timeframe, name):
+        return Cmd.join(DOWNLOAD_DIR, ticker, timeframe, name)
+
+    def __build(self, path):
+        """ Строит индекс по уже загруженным файлам
+        --
+        Используется, когда индекса еще нет (данные загружены
+        предыдущей версией программы). Индекс строится во временной
+        базе и переименовывается в path только после успешного обхода -
+        прерванная сборка не оставит пустой индекс, она повторится при
+        следующем запуске.
+        """
+        tmp_path = path + ".tmp"
+        if Cmd.isExist(tmp_path):
+            Cmd.delete(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                conn.execute(self.SCHEMA)
+                conn.executemany(self.INSERT, self.__scan())
+        finally:
+            conn.close()
+        Cmd.replace(tmp_path, path)
+
+    def __scan(self):
+        """ Строки индекса для файлов в DOWNLOAD_DIR, файлы, которые не
+        удалось прочитать, пропускаются. Если год записан в нескольких
+        форматах, в индекс попадает файл, измененный последним. """
+        rows = dict()  # (ticker, timeframe, year) -> (mtime, row)
+        if not Cmd.isExist(DOWNLOAD_DIR):
+            return list()
+        logger.info(":: Build index of downloaded data")
+        for ticker in Cmd.getDirs(DOWNLOAD_DIR):
+            ticker_dir = Cmd.join(DOWNLOAD_DIR, ticker)
+            for timeframe in Cmd.getDirs(ticker_dir):
+                tf_dir = Cmd.join(ticker_dir, timeframe)
+                for name in Cmd.contents(tf_dir):
+                    storage = findStorage(name)
+                    if storage is None:
+                        continue
+                    path = Cmd.join(tf_dir, name)
+                    try:
+                        stat = storage.stat(path)
+                    except (OSError, ValueError, IndexError) as err:
+                        logger.warning(f"Skip unreadable {path}: {err}")
+                        continue
+                    if stat is None:
+                        continue
+                    first, last, count = stat
+                    key = (ticker, timeframe, first.year)
+                    mtime = os.path.getmtime(path)
+                    if key in rows and rows[key][0] >= mtime:
+                        continue
+                    rows[key] = (mtime, (
+                        ticker, timeframe, first.year, name,
+                        first.isoformat(), last.isoformat(), count,
+                        ))
+        logger.info(f"Index complete, {len(rows)} files")
+        return [row for mtime, row in rows.values()]
+
+    def setFile(self, ticker, timeframe, file_path, first, last, count):
+        """ Записывает (перезаписывает) информацию о файле года first """
+        name = Cmd.name(file_path, extension=True)
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                self.INSERT,
+                (ticker, timeframe, first.year, name,
+                 first.isoformat(), last.isoformat(), count),
+                )
+
+    def appendFile(self, ticker, timeframe, file_path, last, count):
+        """ Учитывает count свечей, дописанных в конец файла
+        --
+        Повторный вызов с тем же last ничего не меняет - дописывание,
+        продолженное после сбоя между индексом и журналом, не
+        учитывается дважды.
+        """
+        name = Cmd.name(file_path, extension=True)
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "UPDATE files SET last = ?, count = count + ? "
+                "WHERE ticker = ? AND timeframe = ? AND name = ? "
+                "AND last < ?",
+                (last.isoformat(), count, ticker, timeframe, name,
+                 last.isoformat()),
+                )
+
+    def lastFile(self, ticker, timeframe):
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT name FROM files "
+                "WHERE ticker = ? AND timeframe = ? "
+                "ORDER BY year DESC LIMIT 1",
+                (ticker, timeframe),
+                ).fetchone()
+        if row is None:
+            return None
+        return self.__filePath(ticker, timeframe, row[0])
+
+    def files(self, ticker, timeframe):
+        """ Возвращает [(path, first, last, count), ...] по порядку лет """
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT name, first, last, count FROM files "
+                "WHERE ticker = ? AND timeframe = ? ORDER BY year",
+                (ticker, timeframe),
+                ).fetchall()
+        files = list()
+        for name, first, last, count in rows:
+            files.append((
+                self.__filePath(ticker, timeframe, name),
+                datetime.fromisoformat(first),
+                datetime.fromisoformat(last),
+                count,
+                ))
+        return files
+
+    def info(self, ticker, timeframe):
+        """ Возвращает dict(first, last, count, files) или None """
+        files = self.files(ticker, timeframe)
+        if len(files) == 0:
+            return None
+        info = {
+            "first":    min(f[1] for f in files),
+            "last":     max(f[2] for f in files),
+            "count":    sum(f[3] for f in files),
+            "files":    [f[0] for f in files],
+            }
+        return info
+
+    def lastDatetime(self, ticker, timeframe):
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT MAX(last) FROM files "
+                "WHERE ticker = ? AND timeframe = ?",
+                (ticker, timeframe),
+                ).fetchone()
+        if row[0] is None:
+            return None
+        return datetime.fromisoformat(row[0])
+
+    def firstDatetime(self, ticker, timeframe):
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT MIN(first) FROM files "
+                "WHERE ticker = ? AND timeframe = ?",
+                (ticker, timeframe),
+                ).fetchone()
+        if row[0] is None:
+            return None
+        return datetime.fromisoformat(row[0])
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,265 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Проверка целостности загруженных данных
+
+Обходит download/<ticker>/<timeframe>/ и проверяет файлы на диске (не
+индекс). Каждая пара (ticker, timeframe) проверяется в отдельном
+процессе, пары распределяются по всем ядрам. Годовые файлы пары
+читаются подряд, поэтому ошибки на стыке лет тоже находятся.
+
+Виды проблем (Issue.kind):
+    unsorted    - begin свечи меньше begin предыдущей
+    duplicate   - begin свечи равен begin предыдущей
+    ohlc        - low > min(open, close), high < max(open, close),
+                  low <= 0, volume < 0 или end < begin
+    gap         - подряд идущие торговые дни (по Timetable), за которые
+                  нет ни одной свечи, между первой и последней свечой
+                  пары. Проверяются таймфреймы не старше D.
+
+Проблемы одного вида в одном файле сворачиваются в одну запись
+(первая и последняя свеча, количество), отчет сохраняется в
+INTEGRITY_FILE. По отчету Scheduler.repairJobs создает задачи повторной
+загрузки только для тех лет, в которых найдены проблемы (gap - только
+по запросу, см. repairJobs).
+"""
+
+import os
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime, date, time, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.const import DOWNLOAD_DIR, INTEGRITY_FILE, ONE_DAY
+from src.utils import Cmd
+from src.storage import findStorage, fromEpochNs
+from src.resample import DAY_NS
+from src.timetable import Timetable
+logger = logging.getLogger("LOGGER")
+
+EPOCH_DATE = date(1970, 1, 1)
+
+
+@dataclass(frozen=True)  #Issue
+class Issue():
+    ticker:     str
+    timeframe:  str
+    kind:       str
+    begin:      datetime
+    end:        datetime
+    count:      int
+    path:       str = ""
+
+    def __str__(self):
+        return (
+            f"{self.ticker}-{self.timeframe} {self.kind} x{self.count} "
+            f"{self.begin:%Y-%m-%d %H:%M} - {self.end:%Y-%m-%d %H:%M}"
+            )
+
+
+@dataclass  #Report
+class Report():
+    created:    datetime
+    files:      int
+    candles:    int
+    issues:     list
+
+    def summary(self) -> dict:
+        """ {kind: количество записей} """
+        summary = dict()
+        for i in self.issues:
+            summary[i.kind] = summary.get(i.kind, 0) + 1
+        return summary
+
+    def toJSON(self) -> dict:
+        return {
+            "created": self.created.isoformat(),
+            "files": self.files,
+            "candles": self.candles,
+            "summary": self.summary(),
+            "issues": [
+                dict(
+                    asdict(i),
+                    begin=i.begin.isoformat(),
+                    end=i.end.isoformat(),
+                    )
+                for i in self.issues
+                ],
+            }
+
+
+def scanPair(ticker, timeframe, paths):
+    """ Проверяет годовые файлы пары, выполняется в дочернем процессе
+    --
+    Возвращает (issues, days, files, candles), days - отсортированный
+    список дней (от 1970-01-01), за которые есть свечи. Пропуски
+    считает родительский процесс, у которого есть календарь.
+    """
+    issues = list()
+    days = set()
+    candles = 0
+    prev = None
+    for path in paths:
+        columns = findStorage(path).load(path)
+        found = dict()  # kind -> [first_ns, last_ns, count]
+
+        def mark(kind, t):
+            item = found.get(kind)
+            if item is None:
+                found[kind] = [t, t, 1]
+            else:
+                item[1] = t
+                item[2] += 1
+
+        b_col = columns["begin"]
+        e_col = columns["end"]
+        o_col = columns["open"]
+        h_col = columns["high"]
+        l_col = columns["low"]
+        c_col = columns["close"]
+        vol_col = columns["volume"]
+        for i in range(len(b_col)):
+            t = b_col[i]
+            if prev is not None:
+                if t < prev:
+                    mark("unsorted", t)
+                elif t == prev:
+                    mark("duplicate", t)
+            prev = t
+            o = o_col[i]
+            c = c_col[i]
+            l = l_col[i]
+            h = h_col[i]
+            if (
+                    l <= 0 or l > o or l > c or h < o or h < c
+                    or vol_col[i] < 0 or e_col[i] < t
+                    ):
+                mark("ohlc", t)
+            days.add(t // DAY_NS)
+        candles += len(b_col)
+        for kind, (first, last, count) in found.items():
+            issues.append((ticker, timeframe, kind, first, last, count, path))
+    return issues, sorted(days), len(paths), candles
+
+
+class Integrity():
+    # пропуски по дням ищутся только для этих таймфреймов
+    DAILY_CHECK = ("1m", "10m", "1h", "D")
+
+    def __init__(self, calendar=None, jobs=None):
+        logger.debug(f"{self.__class__.__name__}.__init__")
+        self.calendar = calendar if calendar is not None else Timetable()
+        self.jobs = jobs if jobs is not None else os.cpu_count() or 1
+
+    @staticmethod  #pairs
+    def pairs(tickers=None, timeframe_list=None):
+        """ {(ticker, timeframe): [path, ...]} по файлам на диске """
+        pairs = dict()
+        if not Cmd.isExist(DOWNLOAD_DIR):
+            return pairs
+        for ticker in sorted(Cmd.getDirs(DOWNLOAD_DIR)):
+            if tickers and ticker not in tickers:
+                continue
+            ticker_dir = Cmd.join(DOWNLOAD_DIR, ticker)
+            for timeframe in sorted(Cmd.getDirs(ticker_dir)):
+                if timeframe_list and timeframe not in timeframe_list:
+                    continue
+                tf_dir = Cmd.join(ticker_dir, timeframe)
+                paths = [
+                    Cmd.join(tf_dir, name)
+                    for name in sorted(Cmd.contents(tf_dir))
+                    if findStorage(name) is not None
+                    ]
+                if paths:
+                    pairs[(ticker, timeframe)] = paths
+        return pairs
+
+    def __gaps(self, ticker, timeframe, days):
+        """ Пропущенные торговые дни между первой и последней свечой """
+        if timeframe not in self.DAILY_CHECK or len(days) < 2:
+            return list()
+        present = set(days)
+        first = EPOCH_DATE + timedelta(days=days[0])
+        last = EPOCH_DATE + timedelta(days=days[-1])
+        gaps = list()
+        run = None  # [первый пропущенный день, последний, количество]
+        for day in self.calendar.tradingDays(first, last + ONE_DAY):
+            if (day - EPOCH_DATE).days in present:
+                if run is not None:
+                    gaps.append(run)
+                    run = None
+            elif run is None:
+                run = [day, day, 1]
+            else:
+                run[1] = day
+                run[2] += 1
+        return [
+            Issue(
+                ticker, timeframe, "gap",
+                datetime.combine(begin, time(0, 0)),
+                datetime.combine(end + ONE_DAY, time(0, 0)),
+                count,
+                )
+            for begin, end, count in gaps
+            ]
+
+    def scan(self, tickers=None, timeframe_list=None, callback=None):
+        """ Проверяет загруженные данные, возвращает Report
+        --
+        tickers, timeframe_list - None: все, что есть на диске.
+        callback(ticker, timeframe, done, total) - вызывается в потоке,
+        запустившем scan, после проверки каждой пары.
+        """
+        pairs = self.pairs(tickers, timeframe_list)
+        total = len(pairs)
+        logger.info(f":: Check {total} ticker/timeframe in {self.jobs} jobs")
+        issues = list()
+        files = 0
+        candles = 0
+        done = 0
+        with ProcessPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            futures = {
+                pool.submit(scanPair, ticker, timeframe, paths):
+                    (ticker, timeframe)
+                for (ticker, timeframe), paths in pairs.items()
+                }
+            for future in as_completed(futures):
+                ticker, timeframe = futures[future]
+                done += 1
+                try:
+                    found, days, count_files, count = future.result()
+                except Exception as err:
+                    logger.error(f"Check {ticker}-{timeframe} failed: {err}")
+                    continue
+                for t, tf, kind, first, last, count_bad, path in found:
+                    issues.append(Issue(
+                        t, tf, kind,
+                        fromEpochNs(first), fromEpochNs(last),
+                        count_bad, path,
+                        ))
+                issues += self.__gaps(ticker, timeframe, days)
+                files += count_files
+                candles += count
+                if callback is not None:
+                    callback(ticker, timeframe, done, total)
+        issues.sort(key=lambda i: (i.ticker, i.timeframe, i.begin, i.kind))
+        report = Report(datetime.now(), files, candles, issues)
+        logger.info(
+            f"Check complete! files={files} candles={candles} "
+            f"issues={report.summary()}"
+            )
+        return report
+
+    @staticmethod  #save
+    def save(report, path=INTEGRITY_FILE):
+        Cmd.createDirs(Cmd.dirPath(path))
+        tmp = path + ".tmp"
+        Cmd.saveJSON(report.toJSON(), tmp, indent=None)
+        Cmd.replace(tmp, path)
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,259 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Менеджер фоновых задач
+
+Задачи (Task) выполняются в общем пуле из JOB_WORKERS потоков в порядке
+приоритета, независимые задачи идут одновременно - например, обновление
+LAST_DATE во время загрузки. Задачи с одинаковым resource выполняются
+по очереди: загрузка, обновление и удаление данных пишут одни и те же
+файлы, поэтому update, поставленный во время download, ждет его
+завершения.
+
+Функция задачи получает Task первым аргументом и между шагами вызывает
+task.checkpoint() - на паузе он ждет resume, после cancel поднимает
+Cancelled. Прогресс задачи - task.setProgress(done, total, status),
+status - необязательная строка состояния (ETA, скорость).
+
+Модуль не зависит от Qt: о каждом изменении состояния и прогресса
+менеджер сообщает подписчикам (subscribe), GUI оборачивает это в сигнал.
+
+    manager = JobManager()
+    manager.subscribe(lambda task: print(task))
+    task = manager.submit("update", func, tickers, priority=Priority.LOW)
+    task.pause(); task.resume(); task.cancel()
+"""
+
+import enum
+import queue
+import logging
+import itertools
+import threading
+from src.const import JOB_WORKERS
+logger = logging.getLogger("LOGGER")
+
+
+class Cancelled(Exception): pass
+
+
+class Priority(enum.IntEnum):
+    HIGH =      0
+    NORMAL =    1
+    LOW =       2
+
+
+class State(enum.Enum):
+    QUEUED =    "queued"
+    RUNNING =   "running"
+    PAUSED =    "paused"
+    DONE =      "done"
+    FAILED =    "failed"
+    CANCELLED = "cancelled"
+
+
+class Task():
+    FINISHED = (State.DONE, State.FAILED, State.CANCELLED)
+    __ids = itertools.count(1)
+
+    def __init__(
+            self, manager, name, func, args, kwargs,
+            priority=Priority.NORMAL, resource=None,
+            ):
+        self.id = next(Task.__ids)
+        self.name = name
+        self.priority = priority
+        self.resource = resource
+        self.state = State.QUEUED
+        self.done = 0
+        self.total = 0
+        self.status = ""
+        self.error = None
+        self.__manager = manager
+        self.__func = func
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__lock = threading.Lock()
+        self.__started = False
+        self.__cancel = threading.Event()
+        self.__running = threading.Event()
+        self.__running.set()
+
+    def __str__(self):
+        progress = f" {self.done}/{self.total}" if self.total else ""
+        return f"[{self.id}] {self.name} {self.state.value}{progress}"
+
+    def __setState(self, state):
+        self.state = state
+        self.__manager.notify(self)
+
+    def setProgress(self, done, total, status=None):
+        self.done = done
+        self.total = total
+        if status is not None:
+            self.status = status
+        self.__manager.notify(self)
+
+    def checkpoint(self):
+        """ Точка паузы и отмены, вызывается функцией задачи """
+        self.__running.wait()
+        if self.__cancel.is_set():
+            raise Cancelled(f"Task {self.id} '{self.name}' cancelled")
+
+    def pause(self):
+        with self.__lock:
+            if self.state not in (State.QUEUED, State.RUNNING):
+                return
+            self.__running.clear()
+            self.__setState(State.PAUSED)
+
+    def resume(self):
+        with self.__lock:
+            if self.state != State.PAUSED:
+                return
+            self.__running.set()
+            if self.__started:
+                self.__setState(State.RUNNING)
+                return
+            self.__setState(State.QUEUED)
+        self.__manager.requeue(self)
+
+    def cancel(self):
+        with self.__lock:
+            if self.state in self.FINISHED:
+                return
+            self.__cancel.set()
+            self.__running.set()
+            if not self.__started:
+                # не начатая задача отменяется сразу, воркер ее пропустит
+                self.__setState(State.CANCELLED)
+
+    def isCancelled(self):
+        return self.__cancel.is_set()
+
+    def start(self):
+        """ Вызывается воркером, False - задачу запускать не нужно """
+        with self.__lock:
+            if self.state != State.QUEUED:
+                return False
+            self.__started = True
+            self.__setState(State.RUNNING)
+            return True
+
+    def run(self):
+        try:
+            self.__func(self, *self.__args, **self.__kwargs)
+        except Cancelled:
+            state = State.CANCELLED
+        except Exception as err:
+            logger.exception(f"Task {self} failed: {err}")
+            self.error = err
+            state = State.FAILED
+        else:
+            state = State.CANCELLED if self.isCancelled() else State.DONE
+        with self.__lock:
+            self.__setState(state)
+
+
+class JobManager():
+    def __init__(self, workers=JOB_WORKERS):
+        logger.debug(f"{self.__class__.__name__}.__init__({workers})")
+        self.__queue = queue.PriorityQueue()
+        self.__order = itertools.count()
+        self.__lock = threading.Lock()
+        self.__listeners = list()
+        self.__tasks = dict()  # id -> Task
+        self.__busy = set()  # занятые resource
+        self.__waiting = list()  # задачи, ждущие свой resource
+        self.__threads = [
+            threading.Thread(
+                target=self.__worker, name=f"job-{i}", daemon=True
+                )
+            for i in range(max(1, workers))
+            ]
+        for thread in self.__threads:
+            thread.start()
+
+    def subscribe(self, callback):
+        """ callback(task) - вызывается в потоке задачи при каждом
+        изменении состояния или прогресса """
+        self.__listeners.append(callback)
+
+    def notify(self, task):
+        for callback in self.__listeners:
+            try:
+                callback(task)
+            except Exception as err:
+                logger.error(f"Job listener failed: {err}")
+
+    def submit(
+            self, name, func, *args,
+            priority=Priority.NORMAL, resource=None, **kwargs,
+            ) -> Task:
+        """ Ставит func(task, *args, **kwargs) в очередь """
+        task = Task(self, name, func, args, kwargs, priority, resource)
+        with self.__lock:
+            self.__tasks[task.id] = task
+        logger.info(f"Job {task.id} '{name}' queued")
+        self.notify(task)
+        self.requeue(task)
+        return task
+
+    def requeue(self, task):
+        self.__queue.put((task.priority, next(self.__order), task))
+
+    def tasks(self) -> list[Task]:
+        with self.__lock:
+            return list(self.__tasks.values())
+
+    def get(self, task_id) -> Task | None:
+        with self.__lock:
+            return self.__tasks.get(task_id)
+
+    def cancelAll(self):
+        for task in self.tasks():
+            task.cancel()
+
+    def __acquire(self, task):
+        """ Занимает resource задачи, False - resource занят """
+        if task.resource is None:
+            return True
+        with self.__lock:
+            if task.resource in self.__busy:
+                self.__waiting.append(task)
+                return False
+            self.__busy.add(task.resource)
+            return True
+
+    def __release(self, task):
+        if task.resource is None:
+            return
+        with self.__lock:
+            self.__busy.discard(task.resource)
+            waiting = [i for i in self.__waiting if i.resource == task.resource]
+            self.__waiting = [
+                i for i in self.__waiting if i.resource != task.resource
+                ]
+        for i in waiting:
+            self.requeue(i)
+
+    def __worker(self):
+        while True:
+            priority, order, task = self.__queue.get()
+            if task.state != State.QUEUED:
+                # отменена или на паузе: resume поставит ее снова
+                continue
+            if not self.__acquire(task):
+                continue
+            try:
+                if task.start():
+                    task.run()
+            finally:
+                self.__release(task)
+
+
+
+if __name__ == "__main__":
+    ...
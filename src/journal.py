@@ -0,0 +1,116 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Журнал незавершенных загрузок
+
+Для каждого записываемого годового файла (ticker, timeframe, year)
+после каждого сброса буфера Writer сохраняет контрольную точку:
+файл, последнюю записанную свечу, количество свечей и размер файла,
+в который идет запись (временного или, при дописывании, самого файла).
+Если программа была закрыта или упала сеть, при следующем запуске в
+режиме resume загрузка продолжается ровно с последней контрольной
+точки, а хвост файла, записанный после нее, обрезается.
+Для дописывания хранится еще base - размер файла до него: без resume
+недописанный хвост отрезается до base, и файл снова совпадает с
+индексом. Точка дописывания сохраняется сразу при открытии Writer,
+до первой записи, поэтому first/last могут быть NULL.
+После фиксации файла (commit) запись из журнала удаляется.
+"""
+
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from src.const import JOURNAL_FILE
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+
+class Journal():
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            ticker      TEXT NOT NULL,
+            timeframe   TEXT NOT NULL,
+            year        INTEGER NOT NULL,
+            path        TEXT NOT NULL,
+            append      INTEGER NOT NULL,
+            first       TEXT,
+            last        TEXT,
+            count       INTEGER NOT NULL,
+            size        INTEGER NOT NULL,
+            base        INTEGER NOT NULL,
+            PRIMARY KEY (ticker, timeframe, year)
+            )
+        """
+    COLUMNS = (
+        "ticker", "timeframe", "year", "path", "append",
+        "first", "last", "count", "size", "base",
+        )
+
+    def __init__(self, path=JOURNAL_FILE):
+        logger.debug(f"{self.__class__.__name__}.__init__({path})")
+        Cmd.createDirs(Cmd.dirPath(path))
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        with self.__conn:
+            self.__conn.execute(self.SCHEMA)
+
+    def __toCheckpoint(self, row):
+        checkpoint = dict(zip(self.COLUMNS, row))
+        checkpoint["append"] = bool(checkpoint["append"])
+        for name in ("first", "last"):
+            if checkpoint[name] is not None:
+                checkpoint[name] = datetime.fromisoformat(checkpoint[name])
+        return checkpoint
+
+    def save(self, ticker, timeframe, year, writer, size):
+        """ Сохраняет контрольную точку Writer после сброса буфера """
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ticker, timeframe, year, writer.path, int(writer.append),
+                 isoformat(writer.first), isoformat(writer.last),
+                 writer.count, size, writer.base),
+                )
+
+    def get(self, ticker, timeframe, year):
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT * FROM checkpoints "
+                "WHERE ticker = ? AND timeframe = ? AND year = ?",
+                (ticker, timeframe, year),
+                ).fetchone()
+        if row is None:
+            return None
+        return self.__toCheckpoint(row)
+
+    def find(self, ticker, timeframe):
+        """ Все контрольные точки ticker/timeframe по порядку лет """
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT * FROM checkpoints "
+                "WHERE ticker = ? AND timeframe = ? ORDER BY year",
+                (ticker, timeframe),
+                ).fetchall()
+        return [self.__toCheckpoint(row) for row in rows]
+
+    def clear(self, ticker, timeframe, year):
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "DELETE FROM checkpoints "
+                "WHERE ticker = ? AND timeframe = ? AND year = ?",
+                (ticker, timeframe, year),
+                )
+
+
+def isoformat(dt):
+    return None if dt is None else dt.isoformat()
+
+
+
+if __name__ == "__main__":
+    ...
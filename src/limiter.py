@@ -0,0 +1,111 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Адаптивное ограничение частоты и параллельности запросов к ISS
+
+Token bucket: токены копятся со скоростью rate в секунду (не больше
+burst), каждый запрос забирает один токен. Дополнительно ограничено
+число одновременных запросов - окно concurrency.
+
+Оба параметра подстраиваются по схеме AIMD (как окно TCP):
+    - успешный ответ: rate += RATE_STEP, окно += 1 / окно
+    - 429, 5xx, таймаут: rate и окно делятся пополам (не чаще COOLDOWN)
+Так загрузка сама выходит на максимальную скорость, которую биржа
+отдает без ошибок, и быстро отступает, если биржа начинает отказывать.
+
+Один AdaptiveLimiter делится между всеми потоками (см. src.session).
+"""
+
+import time
+import logging
+import threading
+from src.const import (
+    REQUEST_RATE, REQUEST_RATE_MIN, REQUEST_RATE_MAX, HTTP_HOST_LIMIT
+    )
+logger = logging.getLogger("LOGGER")
+
+
+class AdaptiveLimiter():
+    RATE_STEP = 0.5  # прирост rate на каждый успешный запрос
+    COOLDOWN = 1.0  # сек, не чаще одного снижения за этот интервал
+
+    def __init__(
+            self,
+            rate=REQUEST_RATE,
+            min_rate=REQUEST_RATE_MIN,
+            max_rate=REQUEST_RATE_MAX,
+            concurrency=HTTP_HOST_LIMIT,
+            ):
+        logger.debug(f"{self.__class__.__name__}.__init__({rate})")
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = concurrency
+        self.window = float(concurrency)
+        self.__tokens = 1.0
+        self.__updated = time.monotonic()
+        self.__active = 0
+        self.__throttled = 0.0
+        self.__cond = threading.Condition()
+
+    def __refill(self, now):
+        burst = max(1.0, self.rate)
+        elapsed = now - self.__updated
+        self.__tokens = min(burst, self.__tokens + elapsed * self.rate)
+        self.__updated = now
+
+    def acquire(self):
+        """ Ждет свободное место в окне и токен """
+        with self.__cond:
+            while True:
+                now = time.monotonic()
+                self.__refill(now)
+                if self.__active < int(self.window) and self.__tokens >= 1.0:
+                    self.__tokens -= 1.0
+                    self.__active += 1
+                    return
+                if self.__active >= int(self.window):
+                    self.__cond.wait()
+                else:
+                    self.__cond.wait((1.0 - self.__tokens) / self.rate)
+
+    def release(self):
+        with self.__cond:
+            self.__active -= 1
+            self.__cond.notify_all()
+
+    def success(self):
+        """ Аддитивный рост после успешного ответа """
+        with self.__cond:
+            self.rate = min(self.max_rate, self.rate + self.RATE_STEP)
+            self.window = min(
+                float(self.max_concurrency), self.window + 1.0 / self.window
+                )
+            self.__cond.notify_all()
+
+    def throttle(self):
+        """ Мультипликативное снижение после 429 / 5xx / таймаута
+        --
+        Ошибки параллельных запросов, пришедшие почти одновременно,
+        снижают скорость один раз, а не по разу на каждый запрос.
+        """
+        with self.__cond:
+            now = time.monotonic()
+            if now - self.__throttled < self.COOLDOWN:
+                return
+            self.__throttled = now
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.window = max(1.0, self.window / 2)
+            self.__tokens = min(self.__tokens, 0.0)
+            logger.warning(
+                f"ISS throttle: rate={self.rate:.1f}/s "
+                f"concurrency={int(self.window)}"
+                )
+
+
+
+if __name__ == "__main__":
+    ...
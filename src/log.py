@@ -0,0 +1,65 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Настройка логирования
+
+Запись в файл не блокирует вызывающий поток: логгер LOGGER отдает
+записи в очередь (QueueHandler), в файл их пишет отдельный поток
+QueueListener. Уровни задаются по модулям в LOG_LEVELS: модули с частыми
+вызовами (src.utils - LOGGER.utils, GUI - LOGGER.gui) пишут в дочерние
+логгеры, и если их уровень выше DEBUG, вызов logger.debug стоит одну
+проверку уровня - сообщения пишутся с ленивым %-форматированием и не
+форматируются вовсе.
+
+    listener = configLogger("LOGGER")
+    setLevels({"LOGGER.utils": "DEBUG"})  # включить отладку Cmd
+"""
+
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from src.const import LOG_DIR, LOG_FILE, LOG_LEVELS
+from src.utils import Cmd
+
+
+def setLevels(levels: dict) -> None:
+    """ {имя логгера: уровень}, уровень - имя или число logging """
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def configLogger(
+        name: str, file_path=LOG_FILE, levels=LOG_LEVELS
+        ) -> QueueListener:
+    """ Подключает файл лога через очередь, возвращает QueueListener
+    --
+    Поток записи останавливается при выходе из программы, оставшиеся
+    в очереди записи при этом дописываются в файл.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    setLevels(levels)
+    if not Cmd.isExist(LOG_DIR):
+        Cmd.createDirs(LOG_DIR)
+    file_formatter = logging.Formatter(
+        "%(module)s: %(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    file_handler = logging.FileHandler(file_path, mode='w')
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(file_formatter)
+    records = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(records))
+    listener = QueueListener(records, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,288 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Метрики запуска загрузки: прогресс, ETA, пропускная способность
+
+RunMetrics собирает счетчики одного запуска Scheduler (download, update,
+repair) из всех потоков:
+    сеть    - запросы к ISS, байты ответов, гистограмма задержек
+              (от отправки запроса до прочитанного ответа, без ожидания
+              в AdaptiveLimiter), время в сети
+    диск    - записанные свечи и байты, время записи (Writer.flush и
+              commit)
+    задачи  - план (задачи по таймфреймам), завершенные, с ошибкой
+
+ETA считается по плану: для каждого таймфрейма оставшиеся задачи
+умножаются на среднюю длительность его завершенных задач (годы 1m
+намного дольше лет D), выполняемые сейчас задачи - на остаток от
+средней, сумма делится на среднее число одновременно работавших задач.
+Сравнение net_time и write_time показывает, что ограничивает загрузку -
+сеть или диск.
+
+    metrics.start("download", jobs)
+    ...
+    metrics.finish("done")
+    metrics.save()  # METRICS_DIR/<дата-время>-download.json
+
+Модуль не зависит от Qt, snapshot() можно вызывать из любого потока.
+Подписчики (subscribe) получают RunMetrics после каждой задачи и не
+чаще NOTIFY_INTERVAL во время запросов - так прогресс-бар обновляется
+и на длинных задачах.
+"""
+
+import time
+import bisect
+import logging
+import threading
+from datetime import datetime
+from src.const import METRICS_DIR
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+
+class Histogram():
+    """ Гистограмма с фиксированными границами корзин, мс """
+    BOUNDS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, bounds=BOUNDS):
+        self.bounds = tuple(bounds)
+        self.clear()
+
+    def clear(self):
+        self.counts = [0] * (len(self.bounds) + 1)  # последняя - больше
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p) -> float | None:
+        """ Верхняя граница корзины, в которую попал p-й процентиль """
+        if self.count == 0:
+            return None
+        rank = p / 100 * self.count
+        passed = 0
+        for bound, count in zip(self.bounds, self.counts):
+            passed += count
+            if passed >= rank:
+                return float(min(bound, self.max))
+        return self.max
+
+    def toJSON(self) -> dict:
+        buckets = {f"<={i}": c for i, c in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": buckets,
+            }
+
+
+class RunMetrics():
+    NOTIFY_INTERVAL = 1.0  # сек, между уведомлениями во время запросов
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__listeners = list()
+        self.__notified = 0.0
+        self.latency = Histogram()
+        self.start()
+
+    def subscribe(self, callback):
+        """ callback(metrics) - вызывается в потоке загрузки """
+        self.__listeners.append(callback)
+
+    def __notify(self, force=False):
+        now = time.monotonic()
+        with self.__lock:
+            if not force and now - self.__notified < self.NOTIFY_INTERVAL:
+                return
+            self.__notified = now
+        for callback in self.__listeners:
+            try:
+                callback(self)
+            except Exception as err:
+                logger.error(f"Metrics listener failed: {err}")
+
+    def start(self, name="", jobs=()):
+        """ Начинает новый запуск, jobs - план, список src.scheduler.Job """
+        with self.__lock:
+            self.name = name
+            self.status = "running"
+            self.started = datetime.now()
+            self.finished = None
+            self.__begin = time.monotonic()
+            self.__end = None
+            self.requests = 0
+            self.request_errors = 0
+            self.bytes_received = 0
+            self.net_time = 0.0
+            self.latency.clear()
+            self.candles = 0
+            self.bytes_written = 0
+            self.write_time = 0.0
+            self.planned = dict()  # timeframe -> задач в плане
+            self.completed = dict()  # timeframe -> завершенных задач
+            self.job_time = dict()  # timeframe -> сек в задачах
+            self.running = dict()  # job -> monotonic начала
+            self.failed = 0
+            for job in jobs:
+                tf = job.timeframe
+                self.planned[tf] = self.planned.get(tf, 0) + 1
+
+    def finish(self, status="done"):
+        with self.__lock:
+            self.status = status
+            self.finished = datetime.now()
+            self.__end = time.monotonic()
+        self.__notify(force=True)
+
+    def request(self, seconds, size, status):
+        """ Ответ ISS (вызывается SharedTransport), status=None -
+        сетевая ошибка или таймаут """
+        with self.__lock:
+            self.requests += 1
+            if status is None or status >= 400:
+                self.request_errors += 1
+            self.bytes_received += size
+            self.net_time += seconds
+            self.latency.add(seconds * 1000)
+        self.__notify()
+
+    def write(self, candles, size, seconds):
+        """ Записано candles свечей, size байт за seconds сек """
+        with self.__lock:
+            self.candles += candles
+            self.bytes_written += size
+            self.write_time += seconds
+
+    def jobStarted(self, job):
+        with self.__lock:
+            self.running[job] = time.monotonic()
+
+    def job(self, job, seconds, error=None):
+        """ Задача завершена за seconds сек """
+        tf = job.timeframe
+        with self.__lock:
+            self.running.pop(job, None)
+            self.completed[tf] = self.completed.get(tf, 0) + 1
+            self.job_time[tf] = self.job_time.get(tf, 0.0) + seconds
+            if error is not None:
+                self.failed += 1
+        self.__notify(force=True)
+
+    def __elapsed(self):
+        end = self.__end if self.__end is not None else time.monotonic()
+        return end - self.__begin
+
+    def __eta(self, elapsed):
+        done = sum(self.completed.values())
+        if done == 0 or elapsed <= 0:
+            return None
+        busy = sum(self.job_time.values())
+        average = busy / done
+
+        def tfAverage(tf):
+            completed = self.completed.get(tf, 0)
+            return self.job_time[tf] / completed if completed else average
+
+        now = time.monotonic()
+        work = 0.0
+        left = dict(self.planned)  # timeframe -> не начатых задач
+        for job, started in self.running.items():
+            age = now - started
+            busy += age
+            work += max(0.0, tfAverage(job.timeframe) - age)
+            left[job.timeframe] = left.get(job.timeframe, 0) - 1
+        for tf, count in left.items():
+            count -= self.completed.get(tf, 0)
+            work += max(0, count) * tfAverage(tf)
+        if work == 0:
+            return None  # идущие задачи дольше средней, оценки нет
+        parallel = max(1.0, busy / elapsed)
+        return work / parallel
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            elapsed = self.__elapsed()
+            total = sum(self.planned.values())
+            done = sum(self.completed.values())
+            rate = 1 / max(1.0, elapsed)  # без всплеска в первую секунду
+            return {
+                "name": self.name,
+                "status": self.status,
+                "elapsed": elapsed,
+                "total": total,
+                "done": done,
+                "failed": self.failed,
+                "progress": done / total if total else 0.0,
+                "eta": 0.0 if done >= total else self.__eta(elapsed),
+                "requests": self.requests,
+                "requests_per_sec": self.requests * rate,
+                "candles": self.candles,
+                "candles_per_sec": self.candles * rate,
+                "bytes_received": self.bytes_received,
+                "bytes_written": self.bytes_written,
+                "net_time": self.net_time,
+                "write_time": self.write_time,
+                }
+
+    def text(self) -> str:
+        """ ETA и скорость - строка для прогресс-бара и лога """
+        s = self.snapshot()
+        eta = "--:--:--" if s["eta"] is None else formatTime(s["eta"])
+        return (
+            f"ETA {eta} "
+            f"{s['requests_per_sec']:.1f} req/s "
+            f"{s['candles_per_sec']:.0f} candles/s "
+            f"{s['bytes_written'] / 2**20:.1f} MB"
+            )
+
+    def toJSON(self) -> dict:
+        summary = self.snapshot()
+        with self.__lock:
+            summary["started"] = self.started.isoformat()
+            summary["finished"] = (
+                None if self.finished is None
+                else self.finished.isoformat()
+                )
+            summary["request_errors"] = self.request_errors
+            summary["latency_ms"] = self.latency.toJSON()
+            summary["jobs"] = {
+                tf: {
+                    "planned": planned,
+                    "done": self.completed.get(tf, 0),
+                    "time": self.job_time.get(tf, 0.0),
+                    }
+                for tf, planned in self.planned.items()
+                }
+        return summary
+
+    def save(self, dir_path=METRICS_DIR) -> str:
+        """ Сохраняет сводку запуска, возвращает путь файла """
+        Cmd.createDirs(dir_path)
+        file_name = f"{self.started:%Y%m%d-%H%M%S}-{self.name}.json"
+        path = Cmd.join(dir_path, file_name)
+        Cmd.saveJSON(self.toJSON(), path)
+        return path
+
+
+def formatTime(seconds) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+
+if __name__ == "__main__":
+    ...
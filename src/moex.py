@@ -6,12 +6,21 @@
 """ Doc """
 
 import logging
+import threading
 from dataclasses import dataclass
 from datetime import datetime, date, time, timedelta
-from moexalgo import Market, Ticker
-from moexalgo.models import Candle
-from src.const import LIST_DIR, DOWNLOAD_DIR, ONE_DAY
+from src.const import (
+    DOWNLOAD_DIR, STORAGE, LOCAL_TIMEFRAMES, CALENDAR_INDEX
+    )
 from src.utils import Cmd
+from src.index import Index
+from src.journal import Journal
+from src.session import HttpSession
+from src.resample import Resampler
+from src.timetable import Timetable
+from src.storage import (
+    Writer, STORAGES, getStorage, findStorage, fromEpochNs,
+    )
 logger = logging.getLogger("LOGGER")
 
 @dataclass  #Bar
@@ -35,15 +44,88 @@ class Bar():
 
     @staticmethod  #fromCSV
     def fromCSV(bar_str):
-        code = f"Bar({bar_str})"
-        bar = eval(code)
+        """ Создает Bar из строки .csv, записанной CsvStorage.format """
+        begin, end, op, hi, lo, cl, value, vol = bar_str.split(";")[:8]
+        bar = Bar(begin, float(op), float(hi), float(lo), float(cl), int(vol))
         return bar
 
+    @staticmethod  #fromColumns
+    def fromColumns(columns):
+        """ Ленивый итератор Bar по колонкам Storage.load
+        --
+        Bar создается только при обращении, сами колонки не копируются.
+        """
+        for i in range(len(columns["begin"])):
+            yield Bar(
+                fromEpochNs(columns["begin"][i]),
+                columns["open"][i],
+                columns["high"][i],
+                columns["low"][i],
+                columns["close"][i],
+                columns["volume"][i],
+                )
+
 
 class MoexData():
-    def __init__(self):
+    """ Const """
+    # Максимальное количество свечей за один вызов Ticker.candles,
+    # больше moexalgo не отдает (внутри он сам листает страницы ISS)
+    LIMIT = 50000
+    # Ширина окна одного запроса для каждого таймфрейма. Окно выбрано так,
+    # чтобы количество свечей в нем гарантированно было меньше LIMIT,
+    # если все же упремся в LIMIT - продолжим с последней полученной свечи
+    WINDOW = {
+        "1m":   timedelta(days=31),
+        "10m":  timedelta(days=366),
+        "1h":   timedelta(days=366 * 5),
+        "D":    timedelta(days=366 * 100),
+        "W":    timedelta(days=366 * 100),
+        "M":    timedelta(days=366 * 100),
+        }
+
+    def __init__(self, storage=STORAGE, http=None):
+        """ http - HttpSession, по умолчанию создается при первом запросе """
         logger.debug(f"{self.__class__.__name__}.__init__")
-        ...
+        self.storage = getStorage(storage)
+        self.__tickers = dict()
+        self.__tickers_lock = threading.Lock()
+        self.__http = None
+        self.__http_lock = threading.Lock()
+        self.index = Index()
+        self.journal = Journal()
+        self.resampler = Resampler(self.index)
+        self.calendar = Timetable()
+        self.__local = threading.local()  # RunMetrics задачи потока
+        if http is not None:
+            self.__setHttp(http)
+
+    def __setHttp(self, http):
+        http.subscribe(self.__onRequest)
+        self.__http = http
+
+    def setMetrics(self, metrics):
+        """ RunMetrics, в которые идут запросы и запись текущего потока
+        --
+        Один MoexData может одновременно обслуживать несколько задач,
+        поэтому метрики привязаны к потоку, а не к объекту. None -
+        не учитывать (см. Scheduler).
+        """
+        self.__local.metrics = metrics
+
+    def __metrics(self):
+        return getattr(self.__local, "metrics", None)
+
+    def __onRequest(self, seconds, size, status):
+        metrics = self.__metrics()
+        if metrics is not None:
+            metrics.request(seconds, size, status)
+
+    @property  #http
+    def http(self):
+        with self.__http_lock:
+            if self.__http is None:
+                self.__setHttp(HttpSession())
+            return self.__http
 
     def __toTimedelta(self, timeframe: str):
         logger.debug(f"{self.__class__.__name__}.__checkTimeFrame")
@@ -71,111 +153,229 @@ class MoexData():
 
     def __createFilePath(self, ticker, timeframe, year):
         dir_path = self.__createDirPath(ticker, timeframe)
-        file_name = f"{ticker}-{timeframe}-{year}.csv"
+        file_name = f"{ticker}-{timeframe}-{year}{self.storage.EXTENSION}"
         full_path = Cmd.join(dir_path, file_name)
         return full_path
 
-    def __format(self, candle: Candle):
-        line = (
-            f"{candle.begin.isoformat()};"
-            f"{candle.end.isoformat()};"
-            f"{candle.open};"
-            f"{candle.high};"
-            f"{candle.low};"
-            f"{candle.close};"
-            f"{candle.value};"
-            f"{int(candle.volume)};"
-            )
-        return line
+    def __findLastFile(self, ticker, timeframe):
+        last_file = self.index.lastFile(ticker, timeframe)
+        return last_file
 
-    def __header(self):
-        """ Возвращает строку заголовок для .csv файлов с данными
+    def __openWriter(self, ticker, timeframe, year, append, resume):
+        """ Создает Writer для годового файла
         --
-        При работе с .csv некоторым бывает удобно сразу в файл записать
-        зоголовки для столбцов. Эта функция создает строку, которую
-        будет использовать функция MoexData.__save() при сохранении файла.
-        По умолчанию сохраняются все поля полученные от Мос.биржи
+        resume=True - если от прерванного запуска остался файл этого
+        года, запись продолжается в него.
+        """
+        def checkpoint(writer, size):
+            self.journal.save(ticker, timeframe, year, writer, size)
+
+        if resume:
+            cp = self.journal.get(ticker, timeframe, year)
+            if cp is not None and self.__isUnfinished(cp):
+                logger.info(
+                    f"  - resume {ticker}-{timeframe}-{year} "
+                    f"from {cp['last']}"
+                    )
+                return Writer(
+                    findStorage(cp["path"]), cp["path"],
+                    checkpoint=cp, on_flush=checkpoint,
+                    )
+        if append:
+            # дописывается в формате существующего файла, а не
+            # self.storage - история могла быть загружена в другом
+            path = self.__findLastFile(ticker, timeframe)
+            return Writer(
+                findStorage(path), path, append, on_flush=checkpoint
+                )
+        path = self.__createFilePath(ticker, timeframe, year)
+        return Writer(self.storage, path, append, on_flush=checkpoint)
+
+    def __commit(self, ticker, timeframe, writer):
+        """ Завершает запись файла и обновляет индекс """
+        year = writer.first.year if writer.first is not None else None
+        committed = writer.commit()
+        self.__account(writer)
+        if not committed:
+            return
+        if writer.append:
+            self.index.appendFile(
+                ticker, timeframe, writer.path, writer.last, writer.count
+                )
+        else:
+            self.index.setFile(
+                ticker, timeframe, writer.path,
+                writer.first, writer.last, writer.count,
+                )
+            self.__removeOtherFormats(writer)
+        self.journal.clear(ticker, timeframe, year)
+
+    def __removeOtherFormats(self, writer):
+        """ Удаляет файл того же года в другом формате - в индексе его
+        уже заменил только что записанный """
+        base = writer.path[:-len(writer.storage.EXTENSION)]
+        for storage_class in STORAGES.values():
+            if storage_class.EXTENSION == writer.storage.EXTENSION:
+                continue
+            path = base + storage_class.EXTENSION
+            if Cmd.isExist(path):
+                logger.info(f"  - remove {path}, replaced by {writer.path}")
+                storage_class().discard(path)
+
+    def __account(self, writer):
+        metrics = self.__metrics()
+        if metrics is not None:
+            metrics.write(writer.flushed, writer.written, writer.write_time)
+
+    def __isUnfinished(self, cp):
+        """ Запись по контрольной точке можно продолжить: новый файл
+        пишется во временный, дописывание - прямо в файл """
+        return cp["append"] or Cmd.isExist(cp["path"] + ".tmp")
+
+    def recover(self, ticker, timeframe):
+        """ Доводит до конца контрольные точки всех лет пары
         --
-        Отредактируйте строку 'header' в удобный для вас формат
-        при этом не забудьте изменить функцию MoexData.__format()
-        чтобы порядок записи данных соответствовал заголовку.
+        Задачи download разных лет одной пары идут параллельно и
+        восстанавливают только свой год, поэтому Scheduler вызывает
+        recover для пары один раз, до запуска ее задач.
         """
-        header = "<begin>;<end>;<open>;<high>;<low>;<close>;<value>;<volume>"
-        return header
-
-    def __toCSV(self, candles):
-        text = list()
-        for i in candles:
-            line = self.__format(i) + "\n"
-            text.append(line)
-        return text
-
-    def __save(self, candles, path):
-        text = list()
-        header = self.__header()
-        text.append(header + "\n")
-        text += self.__toCSV(candles)
-        Cmd.save(text, path)
+        self.__recover(ticker, timeframe)
 
-    def __findLastFile(self, ticker, timeframe):
-        dir_path = Cmd.join(
-            DOWNLOAD_DIR,
-            ticker,
-            timeframe,
-            )
-        if not Cmd.isExist(dir_path):
-            return None
-        files = sorted(Cmd.getFiles(dir_path, full_path=True))
-        if len(files) == 0:
-            return None
-        last_file = files[-1]
-        return last_file
-
-    def __popYear(self, candles, year):
-        extract = list()
-        while len(candles) > 0 and candles[0].begin.year == year:
-            candle = candles.pop(0)
-            extract.append(candle)
-        return extract
-
-    def __addNewCandles(self, ticker, timeframe, new_candles):
-        year = self.getLastDatetime(ticker, timeframe).year
-        current_year_part = self.__popYear(new_candles, year)
-        new_csv_rows = self.__toCSV(current_year_part)
-        last_file_path = self.__findLastFile(ticker, timeframe)
-        Cmd.append(new_csv_rows, last_file_path)
-        # Смотрим остались ли еще новые свечи (если на новый год попали)
-        while len(new_candles) > 0:
-            current_year_part = self.__popYear(new_candles, year)
-            path = self.__createFilePath(ticker, timeframe, year)
-            self.__save(current_year_part, path)
-            year += 1
-
-    @staticmethod  #saveSharesList
-    def saveSharesList(shares, name):
-        path = Cmd.join(LIST_DIR, f"{name}.json")
-        Cmd.saveJSON(shares, path)
-
-    @staticmethod  #loadSharesList
-    def loadSharesList(name):
-        path = Cmd.join(LIST_DIR, f"{name}.json")
-        obj = Cmd.loadJSON(path)
-        return obj
+    def __recover(self, ticker, timeframe, year=None):
+        """ Доводит до конца контрольные точки, файлы которых уже
+        зафиксированы, но индекс не успел обновиться (сбой между
+        переименованием файла и записью в индекс), и прерванные
+        переименования (см. Storage.recover)
+        --
+        year - только контрольная точка этого года, None - все года
+        """
+        if year is None:
+            checkpoints = self.journal.find(ticker, timeframe)
+        else:
+            cp = self.journal.get(ticker, timeframe, year)
+            checkpoints = list() if cp is None else [cp]
+        for cp in checkpoints:
+            findStorage(cp["path"]).recover(cp["path"])
+            if self.__isUnfinished(cp):
+                continue  # незавершенная запись, продолжим в resume
+            if Cmd.isExist(cp["path"]):
+                stat = findStorage(cp["path"]).stat(cp["path"])
+                if stat is not None:
+                    first, last, count = stat
+                    self.index.setFile(
+                        ticker, timeframe, cp["path"], first, last, count
+                        )
+            self.journal.clear(ticker, timeframe, cp["year"])
+
+    def __rollback(self, ticker, timeframe):
+        """ Отменяет прерванные дописывания - файл обрезается до
+        размера перед дописыванием и снова совпадает с индексом """
+        for cp in self.journal.find(ticker, timeframe):
+            if not cp["append"]:
+                continue
+            if Cmd.isExist(cp["path"]):
+                logger.info(f"  - rollback {cp['path']} to {cp['base']}")
+                findStorage(cp["path"]).truncate(cp["path"], cp["base"])
+            self.journal.clear(ticker, timeframe, cp["year"])
+
+    def __finishAppends(self, ticker, timeframe):
+        """ Фиксирует дописывания, продолженные в resume, к которым
+        после контрольной точки не пришло новых свечей - их Writer
+        не открывался, а поток уже закончился """
+        for cp in self.journal.find(ticker, timeframe):
+            if not cp["append"]:
+                continue
+            if Cmd.isExist(cp["path"]):
+                findStorage(cp["path"]).truncate(cp["path"], cp["size"])
+            if cp["count"] > 0:
+                self.index.appendFile(
+                    ticker, timeframe, cp["path"], cp["last"], cp["count"]
+                    )
+            self.journal.clear(ticker, timeframe, cp["year"])
+
+    def __resumePoint(self, ticker, timeframe):
+        """ Последняя свеча, записанная прерванными загрузками, или None """
+        last = None
+        for cp in self.journal.find(ticker, timeframe):
+            if self.__isUnfinished(cp) and cp["last"] is not None:
+                if last is None or cp["last"] > last:
+                    last = cp["last"]
+        return last
+
+    def __writeStream(
+            self, ticker, timeframe, candles, append_year=None, resume=False
+            ):
+        """ Записывает поток свечей по годовым файлам
+        --
+        Свечи года append_year дописываются в последний файл, для
+        остальных лет создаются новые файлы. Файл года фиксируется, как
+        только пошли свечи следующего года, поэтому сбой в декабре не
+        теряет уже записанные года. При сбое записанное сохраняется во
+        временном файле (дописанное - в конце самого файла), см. resume.
+        Возвращает количество записанных свечей.
+        """
+        writer = None
+        year = None
+        total = 0
+        try:
+            for candle in candles:
+                if candle.begin.year != year:
+                    if writer is not None:
+                        self.__commit(ticker, timeframe, writer)
+                    year = candle.begin.year
+                    writer = self.__openWriter(
+                        ticker, timeframe, year, year == append_year, resume
+                        )
+                writer.write(candle)
+                total += 1
+        except BaseException:
+            if writer is not None:
+                writer.suspend()
+                self.__account(writer)
+            raise
+        if writer is not None:
+            self.__commit(ticker, timeframe, writer)
+        return total
 
     def getAllShares(self) -> list:
-        shares = Market("stocks").tickers()
+        from moexalgo import Market  # тяжелый импорт (pandas), по требованию
+        shares = Market("stocks").tickers(cs=self.http.session())
         return shares
 
+    def getTimetable(self) -> dict:
+        """ Расписание торгов фондового рынка из ISS (engines/stock)
+        --
+        {"timetable": [{week_day, is_work_day, start_time, ...}, ...],
+         "dailytable": [{date, is_work_day, start_time, ...}, ...]}
+        """
+        from moexalgo.session import Session  # тяжелый импорт
+        with Session(self.http.session()) as client:
+            data = client.get_objects("engines/stock", lambda data: data)
+        tables = dict()
+        for name in ("timetable", "dailytable"):
+            block = data.get(name, {"columns": [], "data": []})
+            tables[name] = [
+                dict(zip(block["columns"], row)) for row in block["data"]
+                ]
+        return tables
+
+    def getTradingDays(self, begin, end) -> list[date]:
+        """ Торговые дни [begin, end) по дневным свечам CALENDAR_INDEX """
+        candles = self.iterCandles(CALENDAR_INDEX, "D", begin, end)
+        days = [i.begin.date() for i in candles]
+        return days
+
     def getFirstDatetime(self, ticker: str, timeframe="1m"):
         """ Receive first 1M candle from MOEX, and return his datetime """
         date_start = datetime(1900, 1, 1)
         try:
-            share = Ticker(ticker)
+            share = self.__getTicker(ticker)
             candles = share.candles(
                 date=       date_start,
                 till_date=  "today",
                 period=     timeframe,
                 limit=      1,  #  candles count
+                cs=         self.http.session(),
                 )
         except KeyError as err:
             logger.warning(f"MoexData: no market data for {ticker}")
@@ -187,52 +387,155 @@ class MoexData():
     def getLastDatetime(self, ticker: str, timeframe="1m"):
         """ Return last downloaded datetime for ticker/timeframe
         --
-        Search in downloaded data file '{ticker}-{timeframe}-{last_year}.csv
-        return datetime of latest candle.
+        Answer from download index (see src.index), data files
+        are not read.
         --
-        If file not exist return None
+        If data not exist return None
         """
-        last_file = self.__findLastFile(ticker, timeframe)
-        if last_file is None:
-            return None
-        text = Cmd.load(last_file)
-        last_row = text[-1]
-        dt = last_row.split(";")[0]
-        dt = datetime.fromisoformat(dt)
+        dt = self.index.lastDatetime(ticker, timeframe)
         return dt
 
-    def getCandles(self, ticker, timeframe, begin, end):
-        all_candles = list()
+    def __getTicker(self, ticker):
+        from moexalgo import Market, Ticker  # тяжелый импорт, по требованию
+        with self.__tickers_lock:
+            share = self.__tickers.get(ticker)
+            if share is None:
+                # справочник рынка загружается один раз через общий пул,
+                # дальше Ticker() берет его из кэша moexalgo
+                Market("stocks").tickers(cs=self.http.session())
+                if ticker == CALENDAR_INDEX:
+                    Market("index").tickers(cs=self.http.session())
+                share = Ticker(ticker)
+                self.__tickers[ticker] = share
+        return share
+
+    def __planWindows(self, timeframe, begin, end):
+        """ Разбивает период [begin, end) на окна запросов
+        --
+        Первое окно начинается с begin (при update это может быть
+        середина дня), следующие выровнены по началу суток.
+        Ширина окна - MoexData.WINDOW[timeframe]. Окна без торговых
+        часов по календарю (выходные, праздники, ночь) не запрашиваются.
+        """
+        window = self.WINDOW[timeframe]
+        windows = list()
+        dt = begin
+        while dt < end:
+            midnight = datetime.combine(dt.date(), time(0, 0))
+            till = min(midnight + window, end)
+            if self.calendar.hasTradingDays(dt, till):
+                windows.append((dt, till))
+            dt = till
+        return windows
+
+    def __requestWindow(self, share, timeframe, begin, end):
+        """ Запрашивает все свечи окна [begin, end)
+        --
+        Если moexalgo отдал ровно LIMIT свечей - значит окно получено
+        не полностью, продолжаем с последней полученной свечи, пока
+        окно не будет исчерпано.
+        """
+        period = self.__toTimedelta(timeframe)
         dt = begin
         while dt < end:
-            logger.info(f"  - request {ticker}-{timeframe} {dt.date()}")
-            # download in parts by day
-            share = Ticker(ticker)
             candles = share.candles(
                 date=       dt,
-                till_date=  datetime.combine(dt.date(), time(23,59)),
+                till_date=  end - timedelta(minutes=1),
                 period=     timeframe,
-            )
+                limit=      self.LIMIT,
+                cs=         self.http.session(),
+                )
+            count = 0
+            last = None
             for i in candles:
-                all_candles.append(i)
-            dt += ONE_DAY
+                count += 1
+                if i.begin < end:
+                    last = i
+                    yield i
+            if count < self.LIMIT or last is None:
+                break
+            dt = last.begin + period
+
+    def iterCandles(self, ticker, timeframe, begin, end):
+        """ Генератор свечей [begin, end), свечи отдаются по мере
+        получения, весь период в памяти не хранится """
+        share = self.__getTicker(ticker)
+        for dt, till in self.__planWindows(timeframe, begin, end):
+            logger.info(
+                f"  - request {ticker}-{timeframe} {dt.date()} - {till.date()}"
+                )
+            yield from self.__requestWindow(share, timeframe, dt, till)
+
+    def getCandles(self, ticker, timeframe, begin, end):
+        all_candles = list(self.iterCandles(ticker, timeframe, begin, end))
         return all_candles
 
-    def download(self, ticker, timeframe, year):
+    def isLocal(self, ticker, timeframe):
+        """ True если timeframe строится из загруженных данных """
+        if timeframe not in LOCAL_TIMEFRAMES:
+            return False
+        return self.resampler.source(ticker, timeframe) is not None
+
+    def resample(self, ticker, timeframe, begin=None, end=None):
+        """ Строит timeframe из загруженных данных, без запросов к бирже
+        --
+        Годовые файлы периода [begin, end) перезаписываются целиком.
+        timeframe - любой из Resampler.parse, например '5m', '4h', 'W'.
+        """
+        logger.info(f":: Resample {ticker}-{timeframe}")
+        candles = self.resampler.iterCandles(ticker, timeframe, begin, end)
+        count = self.__writeStream(ticker, timeframe, candles)
+        logger.info(f"Saved {count} bars {ticker}-{timeframe}")
+        return count
+
+    def download(self, ticker, timeframe, year, resume=False):
+        """ Загружает год данных ticker/timeframe
+        --
+        resume=True - продолжить прерванную загрузку с контрольной
+        точки, уже загруженные ранее года пропускаются.
+        """
         logger.info(f":: Download {ticker}-{timeframe} from {year}")
         begin = datetime(year, 1, 1)
         end = datetime(year + 1, 1, 1)
         if end >= datetime.now():
-            end = datetime.combine(date.today(), time(0, 0))
-        candles = self.getCandles(ticker, timeframe, begin, end)
-        if len(candles) == 0:
+            end = self.calendar.dataEnd()
+        path = self.__createFilePath(ticker, timeframe, year)
+        self.__recover(ticker, timeframe, year)
+        if resume:
+            cp = self.journal.get(ticker, timeframe, year)
+            info = self.index.info(ticker, timeframe)
+            if cp is not None and Cmd.isExist(cp["path"] + ".tmp"):
+                begin = cp["last"] + self.__toTimedelta(timeframe)
+            elif info is not None and path in info["files"]:
+                logger.info(f"{ticker}-{timeframe}-{year} already exist, skip")
+                return
+        if self.isLocal(ticker, timeframe):
+            candles = self.resampler.iterCandles(
+                ticker, timeframe, begin, end
+                )
+        else:
+            candles = self.iterCandles(ticker, timeframe, begin, end)
+        count = self.__writeStream(ticker, timeframe, candles, resume=resume)
+        if count == 0 and not Cmd.isExist(path):
             logger.warning(f"No data for {ticker}-{timeframe}-{year}!")
             return
-        path = self.__createFilePath(ticker, timeframe, year)
-        self.__save(candles, path)
         logger.info(f"Saved {ticker}-{timeframe}-{year} in {path}")
 
-    def update(self, ticker, timeframe):
+    def update(
+            self, ticker, timeframe, resume=False, begin=None, end=None
+            ):
+        """ Загружает новые свечи после последней загруженной
+        --
+        resume=True - сначала продолжить прерванную загрузку с
+        контрольной точки
+        begin, end - пропуск из src.planner, по умолчанию от свечи
+        после последней загруженной до конца завершенных торгов
+        (см. Timetable.dataEnd); begin раньше свечи после последней
+        загруженной сдвигается к ней
+        """
+        self.__recover(ticker, timeframe)
+        if not resume:
+            self.__rollback(ticker, timeframe)
         last_dt = self.getLastDatetime(ticker, timeframe)
         if last_dt is None:
             logger.warning(
@@ -241,16 +544,32 @@ class MoexData():
                 f"Update {ticker} canceled"
                 )
             return
+        if self.isLocal(ticker, timeframe):
+            # последняя неделя/месяц могли быть неполными - год
+            # перестраивается целиком, это дешево и без сети
+            self.resample(ticker, timeframe, datetime(last_dt.year, 1, 1))
+            return
+        append_year = last_dt.year
+        # begin из src.planner посчитан по индексу до __recover, который
+        # мог сдвинуть последнюю свечу вперед - записанное не запрашиваем
+        next_dt = last_dt + self.__toTimedelta(timeframe)
+        if begin is None or begin < next_dt:
+            begin = next_dt
+        if end is None:
+            end = self.calendar.dataEnd()
+        if resume:
+            resume_dt = self.__resumePoint(ticker, timeframe)
+            if resume_dt is not None and resume_dt >= begin:
+                begin = resume_dt + self.__toTimedelta(timeframe)
         logger.info(f":: Update data for {ticker}-{timeframe}")
-        new_candles = self.getCandles(
-            ticker=     ticker,
-            timeframe=  timeframe,
-            begin=      last_dt + self.__toTimedelta(timeframe),
-            end=        datetime.combine(date.today(), time(0, 0))
+        new_candles = self.iterCandles(ticker, timeframe, begin, end)
+        count = self.__writeStream(
+            ticker, timeframe, new_candles,
+            append_year=append_year, resume=resume,
             )
-        count = len(new_candles)
+        if resume:
+            self.__finishAppends(ticker, timeframe)
         logger.info(f"{ticker}-{timeframe} received {count} canlde")
-        self.__addNewCandles(ticker, timeframe, new_candles)
         logger.info(f"{ticker}-{timeframe} new candles saved")
 
     def deleteMoexData(self):
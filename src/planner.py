@@ -0,0 +1,143 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Планировщик обновления
+
+До отправки запросов для каждой пары (ticker, timeframe) по индексу
+вычисляется точный пропуск: от свечи после последней загруженной до
+начала текущего дня. Края пропуска подрезаются по торговому календарю:
+выходные и праздники в начале и в конце не запрашиваются, а пары, у
+которых между последней свечой и сегодняшним днем нет ни одного
+торгового дня, вообще не попадают в план - для них нет ни одного
+запроса. Оставшиеся пропуски выполняются параллельно (см. Scheduler),
+каждый пропуск - минимальное число окон MoexData.WINDOW.
+
+Календарь - src.timetable.Timetable (или объект с теми же методами
+isTradingDay, hours, dataEnd). Свеча после закрытия торгов дня не
+ищется: пропуск начинается со следующего торгового дня, а конец
+пропуска - Timetable.dataEnd, если день today не задан явно.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from src.timetable import Timetable
+logger = logging.getLogger("LOGGER")
+
+
+@dataclass(frozen=True)  #Gap
+class Gap():
+    ticker:     str
+    timeframe:  str
+    begin:      datetime
+    end:        datetime
+
+    def __str__(self):
+        return (
+            f"{self.ticker}-{self.timeframe} "
+            f"{self.begin:%Y-%m-%d %H:%M} - {self.end:%Y-%m-%d %H:%M}"
+            )
+
+
+class Planner():
+    # шаг, на который следующая свеча позже последней загруженной
+    STEP = {
+        "1m":   timedelta(minutes=1),
+        "10m":  timedelta(minutes=10),
+        "1h":   timedelta(hours=1),
+        "D":    timedelta(days=1),
+        "W":    timedelta(days=1),
+        "M":    timedelta(days=1),
+        }
+
+    def __init__(self, index, calendar=None):
+        logger.debug(f"{self.__class__.__name__}.__init__")
+        self.index = index
+        self.calendar = calendar if calendar is not None else Timetable()
+
+    def __firstTradingDay(self, begin, end):
+        """ Первый торговый день в [begin, end) или None """
+        day = begin.date()
+        while datetime.combine(day, time(0, 0)) < end:
+            if self.calendar.isTradingDay(day):
+                return day
+            day += timedelta(days=1)
+        return None
+
+    def __lastTradingDay(self, begin, end):
+        """ Последний торговый день в [begin, end) или None """
+        day = (end - timedelta(microseconds=1)).date()
+        while day >= begin.date():
+            if self.calendar.isTradingDay(day):
+                return day
+            day -= timedelta(days=1)
+        return None
+
+    def __end(self, today):
+        if today is None:
+            return self.calendar.dataEnd()
+        return datetime.combine(today, time(0, 0))
+
+    def __gap(self, ticker, timeframe, last, end):
+        begin = last + self.STEP[timeframe]
+        hours = self.calendar.hours(begin.date())
+        if hours is not None and begin.time() >= hours[1]:
+            begin = datetime.combine(begin.date(), time(0, 0))
+            begin += timedelta(days=1)
+        if begin >= end:
+            return None
+        first = self.__firstTradingDay(begin, end)
+        if first is None:
+            return None
+        if first != begin.date():
+            begin = datetime.combine(first, time(0, 0))
+        last_day = self.__lastTradingDay(begin, end)
+        end = datetime.combine(last_day + timedelta(days=1), time(0, 0))
+        return Gap(ticker, timeframe, begin, end)
+
+    def gap(self, ticker, timeframe, today=None) -> Gap | None:
+        """ Пропуск ticker/timeframe до начала дня today
+        --
+        today=None - до конца завершенных торгов (Timetable.dataEnd)
+        None - данных нет (нужен download) или пропуск не содержит
+        ни одного торгового дня.
+        """
+        last = self.index.lastDatetime(ticker, timeframe)
+        if last is None:
+            return None
+        return self.__gap(ticker, timeframe, last, self.__end(today))
+
+    def plan(self, tickers, timeframe_list, today=None) -> list[Gap]:
+        """ Пропуски всех пар, без повторов, пары без пропуска пропущены """
+        end = self.__end(today)
+        gaps = dict()
+        missing = 0
+        actual = 0
+        for ticker in tickers:
+            for timeframe in timeframe_list:
+                last = self.index.lastDatetime(ticker, timeframe)
+                if last is None:
+                    logger.warning(
+                        f"{ticker}-{timeframe} not exist data. "
+                        f"Need download data before update"
+                        )
+                    missing += 1
+                    continue
+                gap = self.__gap(ticker, timeframe, last, end)
+                if gap is None:
+                    actual += 1
+                    continue
+                gaps[gap] = None
+        logger.info(
+            f"Update plan: {len(gaps)} gaps, {actual} up to date, "
+            f"{missing} not downloaded"
+            )
+        return list(gaps)
+
+
+
+if __name__ == "__main__":
+    ...
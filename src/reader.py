@@ -0,0 +1,173 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Чтение загруженных данных без копирования
+
+Работает с данными в формате BinStorage: каждая колонка файла данных
+отображается в память (mmap) и возвращается как memoryview нужного типа
+(int64 / float64). Никаких Python объектов на каждую свечу не создается,
+данные не копируются - страницы читаются с диска по мере обращения.
+Выборка по датам - бинарный поиск по колонке 'begin'.
+Года в другом формате (CsvStorage) загружаются в память целиком через
+Storage.load и возвращаются так же, как memoryview по колонкам.
+
+    reader = Reader()
+    with reader.open("SBER", "1m", datetime(2015, 1, 1)) as bars:
+        for close in bars.column("close"):
+            ...  # memoryview по одному году
+
+Если установлен numpy, numpy.frombuffer(view) дает ndarray поверх
+того же буфера, тоже без копирования. Такие производные от выданных
+срезов держат отображение: пока они живы, close() не может его
+закрыть, и файл закрывается только когда на них не останется ссылок.
+"""
+
+import mmap
+import bisect
+import logging
+from src.index import Index
+from src.storage import BinStorage, findStorage, toEpochNs
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+
+class Segment():
+    """ Один файл данных (один год), все колонки отображены в память
+    --
+    Файл не в формате BinStorage загружается через Storage.load.
+    """
+
+    def __init__(self, path):
+        logger.debug(f"{self.__class__.__name__}.__init__({path})")
+        self.path = path
+        self.__files = list()
+        self.__mmaps = list()
+        self.columns = dict()
+        if not path.endswith(BinStorage.EXTENSION):
+            columns = findStorage(path).load(path)
+            for name, _ in BinStorage.COLUMNS:
+                self.columns[name] = memoryview(columns[name])
+            return
+        for name, code in BinStorage.COLUMNS:
+            file = open(Cmd.join(path, name), "rb")
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__files.append(file)
+            self.__mmaps.append(mm)
+            self.columns[name] = memoryview(mm).cast(code)
+
+    def __len__(self):
+        return len(self.columns["begin"])
+
+    def bounds(self, begin_ns=None, end_ns=None):
+        """ Возвращает (lo, hi) - индексы свечей в [begin, end) """
+        column = self.columns["begin"]
+        lo = 0 if begin_ns is None else bisect.bisect_left(column, begin_ns)
+        hi = len(column) if end_ns is None else bisect.bisect_left(
+            column, end_ns
+            )
+        return lo, hi
+
+    def close(self):
+        """ Освобождает колонки и закрывает отображения
+        --
+        Отображение, на которое еще ссылаются срезы вызывающего кода
+        (срез среза, numpy.frombuffer), закрыть нельзя (BufferError) -
+        оно закроется само, когда эти ссылки будут удалены.
+        """
+        for view in self.columns.values():
+            view.release()
+        self.columns.clear()
+        for mm in self.__mmaps:
+            try:
+                mm.close()
+            except BufferError:
+                logger.debug(f"Segment: {self.path} is still in use")
+        for file in self.__files:
+            file.close()
+        self.__mmaps.clear()
+        self.__files.clear()
+
+
+class Bars():
+    """ Выборка свечей ticker/timeframe, набор срезов по годам """
+
+    def __init__(self, ticker, timeframe, parts):
+        self.ticker = ticker
+        self.timeframe = timeframe
+        self.__parts = parts  # list[(Segment, lo, hi)]
+        self.__views = list()  # выданные срезы, освобождаются в close
+
+    def __len__(self):
+        return sum(hi - lo for _, lo, hi in self.__parts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def column(self, name) -> list[memoryview]:
+        """ Срезы колонки name по годам, без копирования """
+        views = list()
+        for segment, lo, hi in self.__parts:
+            views.append(segment.columns[name][lo:hi])
+        self.__views += views
+        return views
+
+    def columns(self) -> list[dict]:
+        """ Все колонки по годам: [{name: memoryview}, ...] """
+        years = list()
+        for segment, lo, hi in self.__parts:
+            year = {
+                name: view[lo:hi] for name, view in segment.columns.items()
+                }
+            self.__views += year.values()
+            years.append(year)
+        return years
+
+    def close(self):
+        for view in self.__views:
+            view.release()
+        self.__views = list()
+        for segment, _, _ in self.__parts:
+            segment.close()
+        self.__parts = list()
+
+
+class Reader():
+    def __init__(self, index=None):
+        logger.debug(f"{self.__class__.__name__}.__init__")
+        self.index = index if index is not None else Index()
+
+    def open(self, ticker, timeframe, begin=None, end=None) -> Bars:
+        """ Открывает свечи ticker/timeframe в диапазоне [begin, end)
+        --
+        begin/end - datetime или None (без ограничения).
+        Файлы, которые не пересекаются с диапазоном, не открываются.
+        Возвращенный Bars нужно закрыть (или использовать with).
+        """
+        begin_ns = None if begin is None else toEpochNs(begin)
+        end_ns = None if end is None else toEpochNs(end)
+        parts = list()
+        for path, first, last, count in self.index.files(ticker, timeframe):
+            if count == 0:
+                continue
+            if begin is not None and last < begin:
+                continue
+            if end is not None and first >= end:
+                continue
+            segment = Segment(path)
+            lo, hi = segment.bounds(begin_ns, end_ns)
+            if lo == hi:
+                segment.close()
+                continue
+            parts.append((segment, lo, hi))
+        return Bars(ticker, timeframe, parts)
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,197 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Построение старших таймфреймов из уже загруженных данных
+
+Таймфрейм задается строкой: '{N}m', '{N}h', 'D', 'W', 'M', например
+'5m', '10m', '4h'. Внутридневные свечи строятся из 1m, дневные и
+старше - из D (если D не загружены - из 1m).
+
+Свечи группируются по корзинам одним проходом по колонкам
+Storage.load, Python объекты создаются только для готовых свечей:
+    open - первый open, close - последний close,
+    high / low - максимум / минимум, value / volume - сумма.
+
+Внутридневные корзины отсчитываются от начала суток, как свечи ISS
+(10:00 - 11:00 для 1h), и не переходят через полночь (последняя корзина
+дня обрезается), поэтому свеча никогда не объединяет сделки двух
+торговых дней. Границы сессий внутри дня не учитываются: календарь
+(src.timetable) знает только начало и конец торгов, поэтому корзина
+может захватить и основную, и вечернюю сессию (4h 16:00 - 20:00).
+Для D/W/M begin - начало первого торгового дня корзины (как у свечей
+ISS), end - end последней свечи-источника.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from src.storage import findStorage, toEpochNs, fromEpochNs
+logger = logging.getLogger("LOGGER")
+
+MINUTE_NS = 60 * 1_000_000_000
+DAY_NS = 1440 * MINUTE_NS
+
+
+@dataclass  #Candle
+class Candle():
+    """ Свеча с теми же полями, что moexalgo.models.Candle """
+    open:   float
+    close:  float
+    high:   float
+    low:    float
+    value:  float
+    volume: int
+    begin:  datetime
+    end:    datetime
+
+
+class Resampler():
+    def __init__(self, index):
+        logger.debug(f"{self.__class__.__name__}.__init__")
+        self.index = index
+
+    @staticmethod  #parse
+    def parse(timeframe):
+        """ '5m' -> ('m', 5 минут в ns), 'D' -> ('D', DAY_NS), ... """
+        if timeframe in ("D", "W", "M"):
+            return timeframe, DAY_NS
+        unit = timeframe[-1:]
+        count = timeframe[:-1]
+        if unit not in ("m", "h") or not count.isdigit() or int(count) == 0:
+            raise ValueError(f"Unknown timeframe '{timeframe}'")
+        step = int(count) * MINUTE_NS * (60 if unit == "h" else 1)
+        if step > DAY_NS:
+            raise ValueError(f"Intraday timeframe '{timeframe}' > 1 day")
+        return "m", step
+
+    def source(self, ticker, timeframe):
+        """ Загруженный таймфрейм, из которого строится timeframe """
+        kind, step = self.parse(timeframe)
+        candidates = ["1m"] if kind == "m" else ["D", "1m"]
+        for source in candidates:
+            if source != timeframe and self.index.info(ticker, source):
+                return source
+        return None
+
+    def __bucket(self, kind, step):
+        """ Функция begin_ns -> начало корзины в ns """
+        if kind == "m":
+            def bucket(t):
+                day = t - t % DAY_NS
+                return day + (t - day) // step * step
+        elif kind == "D":
+            def bucket(t):
+                return t - t % DAY_NS
+        elif kind == "W":
+            def bucket(t):
+                day = t // DAY_NS
+                weekday = (day + 3) % 7  # 1970-01-01 - четверг
+                return (day - weekday) * DAY_NS
+        else:
+            months = dict()  # день -> начало месяца, дат в году ~250
+
+            def bucket(t):
+                day = t - t % DAY_NS
+                first = months.get(day)
+                if first is None:
+                    dt = fromEpochNs(day)
+                    first = toEpochNs(datetime(dt.year, dt.month, 1))
+                    months[day] = first
+                return first
+        return bucket
+
+    def __sourceColumns(self, ticker, source, begin_ns, end_ns):
+        """ Колонки годовых файлов источника, пересекающих период """
+        for path, first, last, count in self.index.files(ticker, source):
+            if begin_ns is not None and toEpochNs(last) < begin_ns:
+                continue
+            if end_ns is not None and toEpochNs(first) >= end_ns:
+                break
+            storage = findStorage(path)
+            if storage is None:
+                logger.warning(f"Resampler: unknown storage {path}, skip")
+                continue
+            yield storage.load(path)
+
+    def iterCandles(self, ticker, timeframe, begin=None, end=None):
+        """ Генератор свечей timeframe, begin которых в [begin, end)
+        --
+        Чтобы корзины на границах периода были полными (неделя на стыке
+        лет), источник читается от начала корзины begin до конца
+        корзины end.
+        """
+        source = self.source(ticker, timeframe)
+        if source is None:
+            logger.warning(f"No source data to build {ticker}-{timeframe}")
+            return
+        kind, step = self.parse(timeframe)
+        bucket = self.__bucket(kind, step)
+        intraday = kind == "m"
+        begin_ns = None if begin is None else toEpochNs(begin)
+        end_ns = None if end is None else toEpochNs(end)
+        stop = None if end_ns is None else bucket(end_ns)
+        src_begin = None if begin_ns is None else bucket(begin_ns)
+        src_end = None if stop is None else stop + 31 * DAY_NS
+        logger.info(f"  - build {ticker}-{timeframe} from {source}")
+
+        def make(key, first, o, h, l, c, v, vol, e):
+            b = key if intraday else first - first % DAY_NS
+            if begin_ns is not None and b < begin_ns:
+                return None
+            if end_ns is not None and b >= end_ns:
+                return None
+            return Candle(
+                o, c, h, l, v, vol, fromEpochNs(b), fromEpochNs(e)
+                )
+
+        key = None
+        files = self.__sourceColumns(ticker, source, src_begin, src_end)
+        for columns in files:
+            b_col = columns["begin"]
+            e_col = columns["end"]
+            o_col = columns["open"]
+            h_col = columns["high"]
+            l_col = columns["low"]
+            c_col = columns["close"]
+            v_col = columns["value"]
+            vol_col = columns["volume"]
+            for i in range(len(b_col)):
+                t = b_col[i]
+                if src_begin is not None and t < src_begin:
+                    continue
+                k = bucket(t)
+                if k != key:
+                    if key is not None:
+                        candle = make(key, first, o, h, l, c, v, vol, e)
+                        if candle is not None:
+                            yield candle
+                    if stop is not None and k > stop:
+                        return
+                    key = k
+                    first = t
+                    o = o_col[i]
+                    h = h_col[i]
+                    l = l_col[i]
+                    v = 0.0
+                    vol = 0
+                else:
+                    if h_col[i] > h:
+                        h = h_col[i]
+                    if l_col[i] < l:
+                        l = l_col[i]
+                c = c_col[i]
+                e = e_col[i]
+                v += v_col[i]
+                vol += vol_col[i]
+        if key is not None:
+            candle = make(key, first, o, h, l, c, v, vol, e)
+            if candle is not None:
+                yield candle
+
+
+
+if __name__ == "__main__":
+    ...
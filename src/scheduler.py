@@ -0,0 +1,267 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Планировщик загрузки рыночных данных
+
+Разбивает загрузку на независимые задачи (ticker, timeframe, year) и
+выполняет их в пуле потоков с ограниченным числом воркеров. Каждая задача
+пишет ровно один файл, поэтому задачи не пересекаются между собой.
+Контрольные точки прерванных загрузок пары восстанавливаются один раз до
+запуска ее задач (MoexData.recover), задача года трогает только свою.
+Модуль не зависит от Qt - прогресс отдается через callback, GUI
+оборачивает его в сигналы. Каждый запуск download / update / repair
+измеряется в Scheduler.metrics (src.metrics): план задач, ETA, запросы,
+свечи, байты. По завершении сводка пишется в лог и в METRICS_DIR.
+Один MoexData можно передавать нескольким Scheduler - запросы и запись
+учитываются в метриках того запуска, в потоке которого выполняются.
+"""
+
+import time
+import logging
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.const import DOWNLOAD_JOBS, LOCAL_TIMEFRAMES
+from src.firstdate import FirstDates
+from src.planner import Planner
+from src.jobs import Cancelled
+from src.metrics import RunMetrics
+logger = logging.getLogger("LOGGER")
+
+
+@dataclass(frozen=True)  #Job
+class Job():
+    ticker:     str
+    timeframe:  str
+    year:       int | None = None
+    begin:      datetime | None = None  # пропуск для update, см. Planner
+    end:        datetime | None = None
+
+    def __str__(self):
+        if self.year is None:
+            return f"{self.ticker}-{self.timeframe}"
+        return f"{self.ticker}-{self.timeframe}-{self.year}"
+
+
+class Scheduler():
+    def __init__(self, moex, jobs=DOWNLOAD_JOBS, checkpoint=None):
+        """ checkpoint() - вызывается перед каждой задачей, может ждать
+        (пауза) или поднять src.jobs.Cancelled (отмена), см. Task """
+        logger.debug(f"{self.__class__.__name__}.__init__")
+        self.moex = moex
+        self.jobs = max(1, jobs)
+        self.checkpoint = checkpoint
+        self.metrics = RunMetrics()
+
+    def __firstYears(self, tickers):
+        """ Год первой свечи для тикеров, из кэша или параллельно с биржи """
+        dates = FirstDates().get(self.moex, tickers, jobs=self.jobs)
+        return {
+            ticker: None if dt is None else dt.year
+            for ticker, dt in dates.items()
+            }
+
+    def __execute(self, func, job, kwargs):
+        if self.checkpoint is not None:
+            self.checkpoint()
+        self.metrics.jobStarted(job)
+        self.moex.setMetrics(self.metrics)
+        started = time.monotonic()
+        try:
+            self.__call(func, job, kwargs)
+        except Exception as err:
+            self.metrics.job(job, time.monotonic() - started, err)
+            raise
+        finally:
+            self.moex.setMetrics(None)
+        self.metrics.job(job, time.monotonic() - started)
+
+    def __call(self, func, job, kwargs):
+        if job.year is not None:
+            func(job.ticker, job.timeframe, job.year, **kwargs)
+        elif job.begin is not None:
+            func(
+                job.ticker, job.timeframe,
+                begin=job.begin, end=job.end, **kwargs
+                )
+        else:
+            func(job.ticker, job.timeframe, **kwargs)
+
+    def downloadJobs(self, tickers, timeframe_list, begin, end):
+        """ Создает список задач загрузки без повторов
+        --
+        begin=None - загрузка с первой доступной даты для каждого тикера
+        """
+        if begin is None:
+            first_years = self.__firstYears(tickers)
+        jobs = dict()  # dict сохраняет порядок и убирает дубликаты
+        for ticker in tickers:
+            first = begin if begin is not None else first_years[ticker]
+            if first is None:
+                logger.warning(f"No market data for {ticker}, skip")
+                continue
+            for timeframe in timeframe_list:
+                for year in range(first, end + 1):
+                    jobs[Job(ticker, timeframe, year)] = None
+        return list(jobs)
+
+    def updateJobs(self, tickers, timeframe_list):
+        """ Задачи update только для пар, у которых есть пропуск
+        с торговыми днями, см. src.planner """
+        self.moex.calendar.refresh(self.moex)
+        planner = Planner(self.moex.index, self.moex.calendar)
+        gaps = planner.plan(tickers, timeframe_list)
+        return [
+            Job(i.ticker, i.timeframe, begin=i.begin, end=i.end)
+            for i in gaps
+            ]
+
+    def repairJobs(self, report, gaps=False):
+        """ Задачи повторной загрузки по отчету src.integrity
+        --
+        Данные хранятся по годам, поэтому перезагружаются только
+        годовые файлы, в которых найдены проблемы: для проблем в
+        файле (порядок, дубликаты, OHLC) - год этого файла по индексу,
+        begin/end таких проблем - времена плохих свечей, и свеча не
+        своего года растянула бы перезагрузку на всю историю; для
+        пропусков - годы от первого до последнего пропущенного дня.
+        gaps=False - пропуски торговых дней не перезагружаются: в
+        неликвидной бумаге это могут быть дни без сделок.
+        """
+        file_years = dict()  # (ticker, timeframe) -> {path: год файла}
+        jobs = dict()
+        for issue in report.issues:
+            if issue.kind == "gap" and not gaps:
+                continue
+            if issue.kind == "gap":
+                last = issue.end - timedelta(microseconds=1)
+                years = range(issue.begin.year, last.year + 1)
+            else:
+                pair = (issue.ticker, issue.timeframe)
+                if pair not in file_years:
+                    file_years[pair] = {
+                        path: first.year for path, first, *_ in
+                        self.moex.index.files(*pair)
+                        }
+                year = file_years[pair].get(issue.path, issue.begin.year)
+                years = (year, )
+            for year in years:
+                jobs[Job(issue.ticker, issue.timeframe, year)] = None
+        return list(jobs)
+
+    def run(self, func, jobs, callback=None, **kwargs):
+        """ Выполняет func для каждой задачи в пуле потоков
+        --
+        func - MoexData.download или MoexData.update
+        kwargs - передаются в func (например resume=True)
+        callback(job, done, total, error) - вызывается в потоке,
+        запустившем run, после завершения каждой задачи,
+        error=None если задача успешна.
+        Возвращает список задач, завершившихся ошибкой.
+        После Cancelled из checkpoint не начатые задачи отменяются,
+        а Cancelled поднимается дальше.
+        """
+        total = len(jobs)
+        done = 0
+        failed = list()
+        cancelled = None
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            futures = {
+                pool.submit(self.__execute, func, job, kwargs): job
+                for job in jobs
+                }
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                job = futures[future]
+                error = future.exception()
+                if isinstance(error, Cancelled):
+                    if cancelled is None:
+                        cancelled = error
+                        for i in futures:
+                            i.cancel()
+                    continue
+                done += 1
+                if error is not None:
+                    logger.error(f"Job {job} failed: {error}")
+                    failed.append(job)
+                if callback is not None:
+                    callback(job, done, total, error)
+        if cancelled is not None:
+            raise cancelled
+        return failed
+
+    def __runPhased(self, func, jobs, callback, **kwargs):
+        """ Сначала задачи загрузки, потом LOCAL_TIMEFRAMES - они
+        строятся из данных, загруженных в первой фазе (W/M из D) """
+        remote = [i for i in jobs if i.timeframe not in LOCAL_TIMEFRAMES]
+        local = [i for i in jobs if i.timeframe in LOCAL_TIMEFRAMES]
+        failed = self.run(func, remote, callback, **kwargs)
+        failed += self.run(func, local, callback, **kwargs)
+        return failed
+
+    def __measure(self, name, func, jobs, callback, **kwargs):
+        """ __runPhased с метриками запуска, см. src.metrics """
+        metrics = self.metrics
+        metrics.start(name, jobs)
+        status = "error"
+        try:
+            failed = self.__runPhased(func, jobs, callback, **kwargs)
+            status = "done"
+            return failed
+        except Cancelled:
+            status = "cancelled"
+            raise
+        finally:
+            metrics.finish(status)
+            snapshot = metrics.snapshot()
+            logger.info(
+                f"{name} {status}: {snapshot['done']}/{snapshot['total']} "
+                f"jobs in {snapshot['elapsed']:.1f}s, {metrics.text()}"
+                )
+            try:
+                path = metrics.save()
+                logger.info(f"Metrics saved in {path}")
+            except OSError as err:
+                logger.warning(f"Failed to save metrics: {err}")
+
+    def __recover(self, jobs):
+        """ MoexData.recover для каждой пары задач, до их запуска """
+        pairs = dict.fromkeys((i.ticker, i.timeframe) for i in jobs)
+        for ticker, timeframe in pairs:
+            try:
+                self.moex.recover(ticker, timeframe)
+            except Exception as err:
+                logger.error(f"Recover {ticker}-{timeframe} failed: {err}")
+
+    def download(
+            self, tickers, timeframe_list, begin, end,
+            callback=None, resume=False,
+            ):
+        self.moex.calendar.refresh(self.moex)
+        jobs = self.downloadJobs(tickers, timeframe_list, begin, end)
+        self.__recover(jobs)
+        return self.__measure(
+            "download", self.moex.download, jobs, callback, resume=resume
+            )
+
+    def update(self, tickers, timeframe_list, callback=None, resume=False):
+        jobs = self.updateJobs(tickers, timeframe_list)
+        return self.__measure(
+            "update", self.moex.update, jobs, callback, resume=resume
+            )
+
+    def repair(self, report, callback=None, gaps=False):
+        """ Перезагружает годы с проблемами из отчета src.integrity """
+        self.moex.calendar.refresh(self.moex)
+        jobs = self.repairJobs(report, gaps)
+        self.__recover(jobs)
+        return self.__measure("repair", self.moex.download, jobs, callback)
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,227 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Общий пул HTTP соединений для запросов к ISS
+
+moexalgo на каждый запрос свечей создает новый httpx.Client, а значит
+новое TCP/TLS соединение. HttpSession держит один транспорт httpx с пулом
+keep-alive соединений и передает его в moexalgo через Session(transport=),
+так что все клиенты moexalgo работают поверх одного пула.
+
+Транспорт подменяемый, например для проверки на локальном сервере:
+
+    http = HttpSession(base_url="http://127.0.0.1:8000/iss")
+    md = MoexData(http=http)
+
+Частоту запросов и повторы при ошибках регулирует SharedTransport
+(см. src.limiter). Подписчики (subscribe) получают длительность, размер
+и статус каждого ответа - так src.metrics считает задержки и трафик.
+httpx и moexalgo импортируются при первом обращении.
+"""
+
+import time
+import random
+import logging
+import threading
+from src.const import (
+    ISS_URL, HTTP_POOL_SIZE, HTTP_HOST_LIMIT, HTTP_KEEPALIVE, HTTP_TIMEOUT,
+    HTTP_RETRIES, HTTP_BACKOFF, HTTP_BACKOFF_MAX,
+    )
+from src.limiter import AdaptiveLimiter
+logger = logging.getLogger("LOGGER")
+
+
+class SharedTransport():
+    """ Обертка транспорта httpx, которую клиенты не могут закрыть
+    --
+    httpx.Client при выходе из with закрывает свой транспорт, здесь
+    close() ничего не делает - пул живет, пока жив HttpSession.
+    Не больше host_limit одновременных запросов к одному хосту.
+    Каждый запрос проходит через AdaptiveLimiter, ответы 429 / 5xx и
+    таймауты повторяются с экспоненциальной задержкой со случайным
+    разбросом (full jitter), но не больше retries раз.
+    """
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(
+            self, transport, limiter,
+            host_limit=HTTP_HOST_LIMIT, retries=HTTP_RETRIES,
+            ):
+        self.transport = transport
+        self.limiter = limiter
+        self.host_limit = host_limit
+        self.retries = retries
+        self.__hosts = dict()  # host -> Semaphore
+        self.__lock = threading.Lock()
+        self.__listeners = list()
+        self.__stats = dict.fromkeys(
+            ("requests", "retries", "throttled", "errors"), 0
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def __semaphore(self, host):
+        with self.__lock:
+            semaphore = self.__hosts.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.host_limit)
+                self.__hosts[host] = semaphore
+            return semaphore
+
+    def __count(self, name):
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def subscribe(self, callback):
+        """ callback(seconds, size, status) - после каждой попытки
+        запроса, status=None - сетевая ошибка или таймаут """
+        self.__listeners.append(callback)
+
+    def __notify(self, started, response):
+        seconds = time.perf_counter() - started
+        size = 0 if response is None else response.num_bytes_downloaded
+        status = None if response is None else response.status_code
+        for callback in self.__listeners:
+            callback(seconds, size, status)
+
+    def __send(self, request):
+        self.limiter.acquire()
+        response = None
+        try:
+            with self.__semaphore(request.url.host):
+                started = time.perf_counter()
+                try:
+                    response = self.transport.handle_request(request)
+                    try:
+                        response.read()  # соединение возвращается в пул
+                    finally:
+                        response.close()
+                finally:
+                    self.__notify(started, response)
+        finally:
+            self.limiter.release()
+        return response
+
+    def __backoff(self, attempt, response):
+        delay = random.uniform(
+            0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF * 2 ** attempt)
+            )
+        retry_after = None
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(HTTP_BACKOFF_MAX, int(retry_after)))
+        return delay
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return dict(self.__stats)
+
+    def handle_request(self, request):
+        import httpx
+        attempt = 0
+        while True:
+            self.__count("requests")
+            error = None
+            response = None
+            try:
+                response = self.__send(request)
+            except (httpx.TimeoutException, httpx.NetworkError) as err:
+                error = err
+            retry = error is not None or (
+                response.status_code in self.RETRY_STATUS
+                )
+            if not retry:
+                if response.is_success:
+                    self.limiter.success()
+                return response
+            self.__count("throttled")
+            self.limiter.throttle()
+            reason = error if error is not None else response.status_code
+            if attempt >= self.retries:
+                self.__count("errors")
+                logger.error(f"ISS request failed: {request.url} {reason}")
+                if error is not None:
+                    raise error
+                return response  # moexalgo сам вызовет raise_for_status
+            delay = self.__backoff(attempt, response)
+            logger.warning(f"ISS retry in {delay:.1f}s: {reason}")
+            self.__count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        pass
+
+
+class HttpSession():
+    def __init__(
+            self,
+            base_url=ISS_URL,
+            pool_size=HTTP_POOL_SIZE,
+            host_limit=HTTP_HOST_LIMIT,
+            keepalive=HTTP_KEEPALIVE,
+            timeout=HTTP_TIMEOUT,
+            transport=None,
+            limiter=None,
+            ):
+        logger.debug(f"{self.__class__.__name__}.__init__({base_url})")
+        import httpx
+        if transport is None:
+            limits = httpx.Limits(
+                max_connections=            pool_size,
+                max_keepalive_connections=  pool_size,
+                keepalive_expiry=           keepalive,
+                )
+            transport = httpx.HTTPTransport(limits=limits)
+        self.base_url = base_url
+        self.timeout = timeout
+        if limiter is None:
+            limiter = AdaptiveLimiter(concurrency=host_limit)
+        self.limiter = limiter
+        self.transport = SharedTransport(transport, limiter, host_limit)
+        self.__session = None
+
+    def session(self):
+        """ Сессия moexalgo для параметра cs= """
+        from moexalgo import session
+        # moexalgo переписывает схему base_url по глобальному флагу
+        session.USE_HTTPS = self.base_url.startswith("https:")
+        # вместо фиксированной паузы moexalgo между запросами
+        # частоту регулирует AdaptiveLimiter
+        session._REQUEST_TIMEOUT = 0
+        if self.__session is None:
+            self.__session = session.Session(
+                base_url=   self.base_url,
+                timeout=    self.timeout,
+                transport=  self.transport,
+                headers=    {"Accept-Encoding": "gzip"},
+                )
+        return self.__session
+
+    def stats(self) -> dict:
+        """ Счетчики: requests, retries, throttled, errors
+        и текущие rate / concurrency лимитера """
+        stats = self.transport.stats()
+        stats["rate"] = self.limiter.rate
+        stats["concurrency"] = int(self.limiter.window)
+        return stats
+
+    def subscribe(self, callback):
+        """ См. SharedTransport.subscribe """
+        self.transport.subscribe(callback)
+
+    def close(self):
+        self.transport.transport.close()
+
+
+
+if __name__ == "__main__":
+    ...
@@ -0,0 +1,501 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Форматы хранения загруженных свечей
+
+CsvStorage - текстовый .csv, одна свеча на строку (формат по умолчанию).
+BinStorage - колоночный бинарный формат: файл данных это папка
+    '{ticker}-{timeframe}-{year}.bin', в которой каждая колонка лежит
+    в отдельном файле как непрерывный массив чисел в машинном
+    представлении (int64 / float64). Чтение года 1m данных - это
+    несколько array.fromfile без разбора строк.
+
+Время в BinStorage хранится как int64 наносекунд от 1970-01-01,
+при этом datetime от биржи (московское время без tzinfo) переводится
+"как есть", без сдвига часового пояса.
+"""
+
+import os
+import time
+import logging
+from array import array
+from datetime import datetime, timedelta
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def toEpochNs(dt: datetime) -> int:
+    return (dt - EPOCH) // ONE_MICROSECOND * 1000
+
+def fromEpochNs(ns: int) -> datetime:
+    return EPOCH + timedelta(microseconds=ns // 1000)
+
+
+class Storage():
+    """ Базовый класс формата хранения """
+    NAME = ""
+    EXTENSION = ""
+
+    def save(self, candles, path):
+        """ Создает (перезаписывает) файл данных со свечами candles """
+        raise NotImplementedError
+
+    def append(self, candles, path):
+        """ Дописывает свечи candles в конец существующего файла """
+        raise NotImplementedError
+
+    def stat(self, path):
+        """ Возвращает (first, last, count) или None если файл пуст """
+        raise NotImplementedError
+
+    def prepare(self, tmp_path):
+        """ Создает пустой временный файл данных для Writer """
+        raise NotImplementedError
+
+    def commit(self, tmp_path, path):
+        """ Заменяет path временным файлом """
+        raise NotImplementedError
+
+    def discard(self, tmp_path):
+        """ Удаляет временный файл, если он есть """
+        raise NotImplementedError
+
+    def recover(self, path):
+        """ Доводит до конца commit, прерванный сбоем (замена файла
+        атомарна - доводить нечего) """
+        pass
+
+    def size(self, path):
+        """ Размер файла данных в байтах (для контрольной точки) """
+        raise NotImplementedError
+
+    def usage(self, path):
+        """ Место на диске, занятое файлом данных, в байтах """
+        return self.size(path)
+
+    def truncate(self, path, size):
+        """ Обрезает файл данных до размера size (см. Storage.size) """
+        raise NotImplementedError
+
+    def load(self, path) -> dict:
+        """ Загружает все колонки, dict[<column name>, <class array>]
+        --
+        Колонки как в BinStorage.COLUMNS: begin/end - int64 наносекунд
+        от 1970-01-01, open/high/low/close/value - float64, volume - int64
+        """
+        raise NotImplementedError
+
+
+class CsvStorage(Storage):
+    NAME = "csv"
+    EXTENSION = ".csv"
+    # порядок колонок, если в файле нет заголовка
+    DEFAULT_ORDER = (
+        "begin", "end", "open", "high", "low", "close", "value", "volume"
+        )
+
+    def format(self, candle):
+        line = (
+            f"{candle.begin.isoformat()};"
+            f"{candle.end.isoformat()};"
+            f"{candle.open};"
+            f"{candle.high};"
+            f"{candle.low};"
+            f"{candle.close};"
+            f"{candle.value};"
+            f"{int(candle.volume)};"
+            )
+        return line
+
+    def header(self):
+        """ Возвращает строку заголовок для .csv файлов с данными
+        --
+        При работе с .csv некоторым бывает удобно сразу в файл записать
+        зоголовки для столбцов. Эта функция создает строку, которую
+        будет использовать функция CsvStorage.save() при сохранении файла.
+        По умолчанию сохраняются все поля полученные от Мос.биржи
+        --
+        Отредактируйте строку 'header' в удобный для вас формат
+        при этом не забудьте изменить функцию CsvStorage.format()
+        чтобы порядок записи данных соответствовал заголовку.
+        """
+        header = "<begin>;<end>;<open>;<high>;<low>;<close>;<value>;<volume>"
+        return header
+
+    def toCSV(self, candles):
+        text = list()
+        for i in candles:
+            line = self.format(i) + "\n"
+            text.append(line)
+        return text
+
+    def save(self, candles, path):
+        text = list()
+        header = self.header()
+        text.append(header + "\n")
+        text += self.toCSV(candles)
+        Cmd.save(text, path)
+
+    def append(self, candles, path):
+        text = self.toCSV(candles)
+        Cmd.append(text, path)
+
+    def prepare(self, tmp_path):
+        self.discard(tmp_path)
+        Cmd.save([self.header() + "\n"], tmp_path)
+
+    def commit(self, tmp_path, path):
+        Cmd.replace(tmp_path, path)
+
+    def discard(self, tmp_path):
+        if Cmd.isExist(tmp_path):
+            Cmd.delete(tmp_path)
+
+    def size(self, path):
+        return os.path.getsize(path)
+
+    def truncate(self, path, size):
+        os.truncate(path, size)
+
+    def stat(self, path):
+        count = 0
+        first = None
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("<"):
+                    continue  # header
+                if first is None:
+                    first = line.split(";")[0]
+                count += 1
+        if count == 0:
+            return None
+        last = Cmd.getTail(path, 1)[0].split(";")[0]
+        first = datetime.fromisoformat(first)
+        last = datetime.fromisoformat(last)
+        return first, last, count
+
+    def __parseTimes(self, strings):
+        """ ISO datetime строки -> array int64 наносекунд
+        --
+        Строки вида 'YYYY-MM-DDTHH:MM:SS' разбираются по частям: дата и
+        время повторяются (дней в году ~250, минут в сутках 1440), поэтому
+        каждая часть разбирается один раз и дальше берется из кэша.
+        """
+        column = array("q")
+        days = dict()
+        times = dict()
+        for s in strings:
+            if len(s) != 19:  # другой формат - общий случай
+                column.append(toEpochNs(datetime.fromisoformat(s)))
+                continue
+            day = days.get(s[:10])
+            if day is None:
+                day = toEpochNs(datetime.fromisoformat(s[:10]))
+                days[s[:10]] = day
+            tm = times.get(s[11:])
+            if tm is None:
+                h, m, sec = s[11:].split(":")
+                tm = (int(h) * 3600 + int(m) * 60 + int(sec)) * 1_000_000_000
+                times[s[11:]] = tm
+            column.append(day + tm)
+        return column
+
+    def __order(self, header_line):
+        """ '<begin>;<end>;...' -> ('begin', 'end', ...) """
+        names = header_line.strip().rstrip(";").split(";")
+        return tuple(name.strip("<>") for name in names)
+
+    def load(self, path) -> dict:
+        """ Разбирает весь .csv за один проход в колонки
+        --
+        Порядок колонок берется из заголовка '<begin>;<end>;...', если
+        его нет - используется CsvStorage.DEFAULT_ORDER.
+        """
+        text = Cmd.read(path)
+        lines = text.splitlines()
+        order = self.DEFAULT_ORDER
+        if len(lines) > 0 and lines[0].startswith("<"):
+            order = self.__order(lines[0])
+            lines = lines[1:]
+        # строки заканчиваются на ';' - последнее пустое поле отбрасываем
+        fields = zip(*(line.split(";") for line in lines if line))
+        raw = dict(zip(order, fields))
+        columns = dict()
+        for name, code in BinStorage.COLUMNS:
+            values = raw.get(name, ())
+            if name in ("begin", "end"):
+                columns[name] = self.__parseTimes(values)
+            elif code == "q":
+                columns[name] = array(code, map(int, values))
+            else:
+                columns[name] = array(code, map(float, values))
+        return columns
+
+
+class BinStorage(Storage):
+    NAME = "bin"
+    EXTENSION = ".bin"
+    # (имя колонки, typecode array) - q: int64, d: float64
+    COLUMNS = (
+        ("begin",   "q"),
+        ("end",     "q"),
+        ("open",    "d"),
+        ("high",    "d"),
+        ("low",     "d"),
+        ("close",   "d"),
+        ("value",   "d"),
+        ("volume",  "q"),
+        )
+
+    def __toColumns(self, candles):
+        columns = {name: array(code) for name, code in self.COLUMNS}
+        for i in candles:
+            columns["begin"].append(toEpochNs(i.begin))
+            columns["end"].append(toEpochNs(i.end))
+            columns["open"].append(i.open)
+            columns["high"].append(i.high)
+            columns["low"].append(i.low)
+            columns["close"].append(i.close)
+            columns["value"].append(i.value)
+            columns["volume"].append(int(i.volume))
+        return columns
+
+    def __write(self, candles, path, mode):
+        Cmd.createDirs(path)
+        columns = self.__toColumns(candles)
+        for name, column in columns.items():
+            with open(Cmd.join(path, name), mode) as file:
+                column.tofile(file)
+
+    def save(self, candles, path):
+        self.__write(candles, path, "wb")
+        logger.debug(f"Save bin: {path}")
+
+    def append(self, candles, path):
+        self.__write(candles, path, "ab")
+        logger.debug(f"Append bin: {path}")
+
+    def prepare(self, tmp_path):
+        self.discard(tmp_path)
+        self.save(list(), tmp_path)
+
+    def commit(self, tmp_path, path):
+        # папку нельзя атомарно заменить поверх непустой папки,
+        # поэтому старая версия сначала отодвигается в сторону
+        old_path = path + ".old"
+        if Cmd.isExist(old_path):
+            Cmd.deleteDir(old_path)
+        if Cmd.isExist(path):
+            Cmd.rename(path, old_path)
+        Cmd.rename(tmp_path, path)
+        if Cmd.isExist(old_path):
+            Cmd.deleteDir(old_path)
+
+    def discard(self, tmp_path):
+        if Cmd.isExist(tmp_path):
+            Cmd.deleteDir(tmp_path)
+
+    def recover(self, path):
+        # сбой в commit между переименованиями оставляет path.old без
+        # path; commit вызывается только для полностью записанной
+        # временной папки, поэтому ее переименование доводится до конца
+        old_path = path + ".old"
+        if not Cmd.isExist(old_path):
+            return
+        if not Cmd.isExist(path):
+            tmp_path = path + ".tmp"
+            if Cmd.isExist(tmp_path):
+                Cmd.rename(tmp_path, path)
+                logger.warning(f"Finish interrupted commit: {path}")
+            else:
+                Cmd.rename(old_path, path)
+                logger.warning(f"Restore {path} from {old_path}")
+                return
+        Cmd.deleteDir(old_path)
+
+    def size(self, path):
+        # все колонки по 8 байт, размер одной колонки задает остальные
+        return os.path.getsize(Cmd.join(path, "begin"))
+
+    def usage(self, path):
+        return self.size(path) * len(self.COLUMNS)
+
+    def truncate(self, path, size):
+        for name, _ in self.COLUMNS:
+            os.truncate(Cmd.join(path, name), size)
+
+    def stat(self, path):
+        begin_path = Cmd.join(path, "begin")
+        size = os.path.getsize(begin_path)
+        count = size // 8
+        if count == 0:
+            return None
+        column = array("q")
+        with open(begin_path, "rb") as file:
+            column.fromfile(file, 1)
+            file.seek(-8, os.SEEK_END)
+            column.fromfile(file, 1)
+        first = fromEpochNs(column[0])
+        last = fromEpochNs(column[1])
+        return first, last, count
+
+    def load(self, path) -> dict:
+        """ Загружает все колонки, dict[<column name>, <class array>] """
+        columns = dict()
+        for name, code in self.COLUMNS:
+            column_path = Cmd.join(path, name)
+            column = array(code)
+            with open(column_path, "rb") as file:
+                count = os.path.getsize(column_path) // column.itemsize
+                column.fromfile(file, count)
+            columns[name] = column
+        return columns
+
+
+class Writer():
+    """ Потоковая запись свечей в файл данных
+    --
+    Свечи копятся в буфере по BATCH штук и дописываются во временный
+    файл '{path}.tmp'. Файл path заменяется только в commit(), поэтому
+    после сбоя на диске остается либо старая, либо новая версия
+    целиком. Память не зависит от количества записанных свечей.
+    append=True - свечи дописываются прямо в конец path, без копии:
+    base - размер файла до дописывания, abort() обрезает файл до него,
+    после сбоя это делает владелец журнала (см. src.journal).
+
+        with Writer(storage, path) as writer:
+            for candle in candles:
+                writer.write(candle)
+
+    При выходе из with без исключения - commit(), иначе - abort().
+    --
+    checkpoint - контрольная точка из Journal: запись продолжается в
+    оставшийся от прерванного запуска файл, его хвост после
+    контрольной точки обрезается.
+    on_flush(writer, size) - вызывается после каждого сброса буфера,
+    size - размер файла, в который идет запись. При дописывании
+    вызывается и сразу при открытии, с size == base - так журнал
+    узнает размер файла до первой записи.
+    flushed, written, write_time - свечей и байт записано на диск этим
+    Writer и секунд на это потрачено (для src.metrics).
+    """
+    BATCH = 10000
+
+    def __init__(
+            self, storage, path, append=False, checkpoint=None, on_flush=None
+            ):
+        self.storage = storage
+        self.path = path
+        self.append = append if checkpoint is None else checkpoint["append"]
+        self.tmp_path = path if self.append else path + ".tmp"
+        self.on_flush = on_flush
+        self.first = None
+        self.last = None
+        self.count = 0
+        self.flushed = 0
+        self.written = 0
+        self.write_time = 0.0
+        self.__buffer = list()
+        if checkpoint is None:
+            if not self.append:
+                self.storage.prepare(self.tmp_path)
+            self.base = self.storage.size(self.tmp_path)
+        else:
+            self.base = checkpoint["base"]
+            self.first = checkpoint["first"]
+            self.last = checkpoint["last"]
+            self.count = checkpoint["count"]
+            self.storage.truncate(self.tmp_path, checkpoint["size"])
+        self.__usage = self.storage.usage(self.tmp_path)
+        if checkpoint is None and self.append and on_flush is not None:
+            on_flush(self, self.base)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def write(self, candle):
+        if self.first is None:
+            self.first = candle.begin
+        self.last = candle.begin
+        self.count += 1
+        self.__buffer.append(candle)
+        if len(self.__buffer) >= self.BATCH:
+            self.flush()
+
+    def flush(self):
+        if len(self.__buffer) > 0:
+            started = time.perf_counter()
+            self.storage.append(self.__buffer, self.tmp_path)
+            size = self.storage.size(self.tmp_path)
+            usage = self.storage.usage(self.tmp_path)
+            self.write_time += time.perf_counter() - started
+            self.flushed += len(self.__buffer)
+            self.written += usage - self.__usage
+            self.__usage = usage
+            self.__buffer.clear()
+            if self.on_flush is not None:
+                self.on_flush(self, size)
+
+    def commit(self):
+        """ Заменяет path записанными данными
+        --
+        Если не записано ни одной свечи, файл не меняется.
+        Возвращает True если файл был заменен (дополнен).
+        """
+        if self.count == 0:
+            self.abort()
+            return False
+        self.flush()
+        if not self.append:
+            started = time.perf_counter()
+            self.storage.commit(self.tmp_path, self.path)
+            self.write_time += time.perf_counter() - started
+        return True
+
+    def suspend(self):
+        """ Сохраняет записанное на диск и оставляет файл для
+        продолжения загрузки (см. checkpoint) """
+        self.flush()
+
+    def abort(self):
+        self.__buffer.clear()
+        if self.append:
+            self.storage.truncate(self.path, self.base)
+        else:
+            self.storage.discard(self.tmp_path)
+
+
+STORAGES = {
+    CsvStorage.NAME: CsvStorage,
+    BinStorage.NAME: BinStorage,
+    }
+
+def getStorage(name: str) -> Storage:
+    """ Возвращает формат хранения по имени: 'csv' или 'bin' """
+    if name not in STORAGES:
+        raise ValueError(f"Unknown storage '{name}', use one of {list(STORAGES)}")
+    return STORAGES[name]()
+
+def findStorage(path: str) -> Storage | None:
+    """ Определяет формат хранения по пути к файлу данных """
+    for storage_class in STORAGES.values():
+        if path.endswith(storage_class.EXTENSION):
+            return storage_class()
+    return None
+
+
+
+if __name__ == "__main__":
+    ...
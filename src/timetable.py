@@ -0,0 +1,228 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Торговый календарь фондового рынка MOEX
+
+Источники, в порядке приоритета:
+    1. История торговых дней - дни, за которые есть дневная свеча
+       индекса CALENDAR_INDEX. Внутри загруженного периода день
+       торговый тогда и только тогда, когда он есть в истории.
+    2. Таблица исключений ISS (engines/stock, блок dailytable) -
+       праздники, рабочие выходные и дни с другими часами торгов.
+    3. Недельное расписание ISS (блок timetable), по умолчанию
+       будни с 09:50 до 23:50.
+
+Календарь хранится в CALENDAR_FILE и обновляется с биржи не чаще
+CALENDAR_TTL, история торговых дней дозагружается только за новые дни.
+Без сети календарь работает по сохраненным данным или по умолчанию.
+"""
+
+import logging
+import threading
+from datetime import datetime, date, time
+from src.const import CALENDAR_FILE, CALENDAR_TTL, ONE_DAY
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+
+class Timetable():
+    DEFAULT_HOURS = (time(9, 50), time(23, 50))
+    HISTORY_BEGIN = date(1997, 1, 1)
+
+    def __init__(self, path=CALENDAR_FILE):
+        logger.debug(f"{self.__class__.__name__}.__init__({path})")
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__updated = None
+        self.__weekly = {
+            weekday: (weekday < 5, *self.DEFAULT_HOURS)
+            for weekday in range(7)
+            }
+        self.__daily = dict()  # date -> (work, start, stop)
+        self.__days = set()  # торговые дни из истории
+        self.__first = None  # период истории [first, last]
+        self.__last = None
+        if Cmd.isExist(path):
+            self.__load()
+
+    @staticmethod  #__toTime
+    def __toTime(string):
+        if not string:
+            return None
+        return time.fromisoformat(string)
+
+    def __load(self):
+        obj = Cmd.loadJSON(self.path, decoder=None)
+        if obj["updated"] is not None:
+            self.__updated = datetime.fromisoformat(obj["updated"])
+        for weekday, (work, start, stop) in obj["weekly"].items():
+            self.__weekly[int(weekday)] = (
+                bool(work), self.__toTime(start), self.__toTime(stop)
+                )
+        self.__daily = {
+            date.fromisoformat(day): (
+                bool(work), self.__toTime(start), self.__toTime(stop)
+                )
+            for day, (work, start, stop) in obj["daily"].items()
+            }
+        history = obj["history"]
+        if history["first"] is not None:
+            self.__first = date.fromisoformat(history["first"])
+            self.__last = date.fromisoformat(history["last"])
+            self.__days = {date.fromisoformat(i) for i in history["days"]}
+
+    def __save(self):
+        def hours(work, start, stop):
+            return [
+                int(work),
+                None if start is None else start.isoformat(),
+                None if stop is None else stop.isoformat(),
+                ]
+
+        obj = {
+            "updated": None if self.__updated is None
+                else self.__updated.isoformat(),
+            "weekly": {
+                str(weekday): hours(*value)
+                for weekday, value in self.__weekly.items()
+                },
+            "daily": {
+                day.isoformat(): hours(*value)
+                for day, value in sorted(self.__daily.items())
+                },
+            "history": {
+                "first": None if self.__first is None
+                    else self.__first.isoformat(),
+                "last": None if self.__last is None
+                    else self.__last.isoformat(),
+                "days": sorted(i.isoformat() for i in self.__days),
+                },
+            }
+        Cmd.createDirs(Cmd.dirPath(self.path))
+        tmp = self.path + ".tmp"
+        Cmd.saveJSON(obj, tmp, indent=None)
+        Cmd.replace(tmp, self.path)
+
+    def isExpired(self):
+        if self.__updated is None:
+            return True
+        return datetime.now() - self.__updated > CALENDAR_TTL
+
+    def __parseTables(self, tables):
+        for row in tables.get("timetable", list()):
+            weekday = int(row["week_day"]) - 1  # ISS: 1 - понедельник
+            self.__weekly[weekday] = (
+                bool(row["is_work_day"]),
+                self.__toTime(row["start_time"]) or self.DEFAULT_HOURS[0],
+                self.__toTime(row["stop_time"]) or self.DEFAULT_HOURS[1],
+                )
+        for row in tables.get("dailytable", list()):
+            day = date.fromisoformat(row["date"])
+            self.__daily[day] = (
+                bool(row["is_work_day"]),
+                self.__toTime(row["start_time"]),
+                self.__toTime(row["stop_time"]),
+                )
+
+    def refresh(self, moex, force=False):
+        """ Обновляет расписание и дозагружает историю торговых дней
+        --
+        История продлевается только до последнего полученного дня:
+        дни после него (индекс еще не опубликован, сбой сети) остаются
+        вне истории и берутся по расписанию, а при следующем
+        обновлении запрашиваются снова. Если запрос не удался,
+        календарь не считается свежим и обновится при следующем вызове.
+        """
+        if not force and not self.isExpired():
+            return
+        logger.info(":: Refresh trading calendar")
+        with self.__lock:
+            complete = True
+            try:
+                self.__parseTables(moex.getTimetable())
+            except Exception as err:
+                logger.warning(f"Failed to get ISS timetable: {err}")
+                complete = False
+            begin = self.HISTORY_BEGIN
+            if self.__last is not None:
+                begin = self.__last + ONE_DAY
+            end = date.today()
+            try:
+                if begin < end:
+                    days = moex.getTradingDays(
+                        datetime.combine(begin, time(0, 0)),
+                        datetime.combine(end, time(0, 0)),
+                        )
+                    self.__days.update(days)
+                    if days:
+                        self.__first = self.__first or min(days)
+                        self.__last = max(days)
+            except Exception as err:
+                logger.warning(f"Failed to get trading days history: {err}")
+                complete = False
+            if complete:
+                self.__updated = datetime.now()
+            self.__save()
+        logger.info(f"Calendar complete! {len(self.__days)} trading days")
+
+    def isTradingDay(self, day: date) -> bool:
+        if self.__first is not None and self.__first <= day <= self.__last:
+            return day in self.__days
+        exception = self.__daily.get(day)
+        if exception is not None:
+            return exception[0]
+        return self.__weekly[day.weekday()][0]
+
+    def hours(self, day: date):
+        """ (начало, конец) торгов дня или None, если день не торговый """
+        if not self.isTradingDay(day):
+            return None
+        work, start, stop = self.__daily.get(day, (True, None, None))
+        weekly = self.__weekly[day.weekday()]
+        start = start or weekly[1] or self.DEFAULT_HOURS[0]
+        stop = stop or weekly[2] or self.DEFAULT_HOURS[1]
+        return start, stop
+
+    def tradingDays(self, begin: date, end: date) -> list[date]:
+        """ Торговые дни [begin, end) """
+        days = list()
+        day = begin
+        while day < end:
+            if self.isTradingDay(day):
+                days.append(day)
+            day += ONE_DAY
+        return days
+
+    def hasTradingDays(self, begin: datetime, end: datetime) -> bool:
+        """ True если в [begin, end) есть время торгов """
+        day = begin.date()
+        while datetime.combine(day, time(0, 0)) < end:
+            hours = self.hours(day)
+            if hours is not None:
+                open_dt = datetime.combine(day, hours[0])
+                close_dt = datetime.combine(day, hours[1])
+                if begin < close_dt and open_dt < end:
+                    return True
+            day += ONE_DAY
+        return False
+
+    def dataEnd(self, now=None) -> datetime:
+        """ Граница окончательных данных
+        --
+        Начало следующего дня, если торги сегодня уже закончились,
+        иначе начало сегодняшнего дня - незавершенный день не грузится.
+        """
+        now = now if now is not None else datetime.now()
+        today = now.date()
+        hours = self.hours(today)
+        if hours is not None and now.time() >= hours[1]:
+            return datetime.combine(today + ONE_DAY, time(0, 0))
+        return datetime.combine(today, time(0, 0))
+
+
+
+if __name__ == "__main__":
+    ...
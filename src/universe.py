@@ -0,0 +1,123 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Кэш списков акций (папка 'list')
+
+Списки читаются с диска один раз и хранятся в памяти по имени списка,
+повторное обращение (например, переключение списка в комбобоксе) файл
+не перечитывает. В списках нет дат, поэтому json читается без
+decodeJSON, который проверяет каждое строковое значение.
+
+Общий список all.json обновляется с биржи, если он старше UNIVERSE_TTL.
+Новый список сравнивается со старым по SECID, появившиеся (listed) и
+пропавшие (delisted) акции дописываются в историю UNIVERSE_FILE:
+
+    {"history": [{"date": "...", "listed": [...], "delisted": [...]}]}
+"""
+
+import logging
+import threading
+from datetime import datetime
+from src.const import LIST_DIR, UNIVERSE_FILE, UNIVERSE_TTL
+from src.utils import Cmd
+logger = logging.getLogger("LOGGER")
+
+
+class Universe():
+    GENERAL = "all"  # общий список всех акций MOEX
+
+    def __init__(self):
+        logger.debug(f"{self.__class__.__name__}.__init__()")
+        self.__lists = dict()  # name -> list[dict]
+        self.__lock = threading.Lock()
+
+    @staticmethod  #path
+    def path(name):
+        return Cmd.join(LIST_DIR, f"{name}.json")
+
+    @staticmethod  #names
+    def names():
+        """ Имена всех списков в папке 'list' """
+        if not Cmd.isExist(LIST_DIR):
+            return list()
+        files = Cmd.select(Cmd.getFiles(LIST_DIR), ".json")
+        return sorted(Cmd.name(file) for file in files)
+
+    def load(self, name) -> list[dict]:
+        with self.__lock:
+            shares = self.__lists.get(name)
+        if shares is not None:
+            return shares
+        shares = Cmd.loadJSON(self.path(name), decoder=None)
+        with self.__lock:
+            self.__lists[name] = shares
+        return shares
+
+    def save(self, shares, name):
+        Cmd.createDirs(LIST_DIR)
+        path = self.path(name)
+        tmp = path + ".tmp"
+        Cmd.saveJSON(shares, tmp)
+        Cmd.replace(tmp, path)
+        with self.__lock:
+            self.__lists[name] = shares
+
+    def isExpired(self):
+        """ True если общего списка нет или он старше UNIVERSE_TTL """
+        path = self.path(self.GENERAL)
+        if not Cmd.isExist(path):
+            return True
+        updated = datetime.fromtimestamp(Cmd.getModified(path))
+        return datetime.now() - updated > UNIVERSE_TTL
+
+    def refresh(self, moex, force=False):
+        """ Обновляет общий список с биржи, если он устарел
+        --
+        Возвращает {"listed": [...], "delisted": [...]} или None,
+        если список еще актуален.
+        """
+        if not force and not self.isExpired():
+            return None
+        logger.info(":: Refresh shares list")
+        fresh = moex.getAllShares()
+        if Cmd.isExist(self.path(self.GENERAL)):
+            old = self.load(self.GENERAL)
+        else:
+            old = list()
+        diff = self.__diff(old, fresh)
+        self.save(fresh, self.GENERAL)
+        if old and (diff["listed"] or diff["delisted"]):
+            self.__record(diff)
+        for secid in diff["listed"]:
+            logger.info(f"  - listed {secid}")
+        for secid in diff["delisted"]:
+            logger.info(f"  - delisted {secid}")
+        logger.info(f"Refresh complete! {len(fresh)} shares")
+        return diff
+
+    def history(self) -> list[dict]:
+        if not Cmd.isExist(UNIVERSE_FILE):
+            return list()
+        return Cmd.loadJSON(UNIVERSE_FILE, decoder=None)["history"]
+
+    def __diff(self, old, fresh):
+        old_ids = {i["SECID"] for i in old}
+        fresh_ids = {i["SECID"] for i in fresh}
+        return {
+            "listed": sorted(fresh_ids - old_ids),
+            "delisted": sorted(old_ids - fresh_ids),
+            }
+
+    def __record(self, diff):
+        history = self.history()
+        history.append({"date": datetime.now().isoformat(), **diff})
+        Cmd.createDirs(Cmd.dirPath(UNIVERSE_FILE))
+        Cmd.saveJSON({"history": history}, UNIVERSE_FILE)
+
+
+
+if __name__ == "__main__":
+    ...
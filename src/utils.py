@@ -14,12 +14,11 @@ import zipfile
 import logging
 import subprocess
 from pprint import pprint
-from collections import deque
 from datetime import datetime, date, time, timedelta
 sys.path.append("/home/alex/yandex/avin-dev/avin/")
 from src.const import UTC
 
-logger = logging.getLogger("LOGGER")
+logger = logging.getLogger("LOGGER.utils")
 
 
 def now():
@@ -59,7 +58,7 @@ def decodeJSON(obj):
 class Cmd():
     @staticmethod  #join
     def join(*path):
-        logger.debug(f"Cmd.join({path})")
+        logger.debug("Cmd.join(%s)", path)
         path = os.path.join(*path)
         return path
 
@@ -70,7 +69,7 @@ class Cmd():
         /home/file_name.txt -> file_name.txt  # extension=True
         /home/file_name.txt -> file_name  # extension=False
         """
-        logger.debug(f"Cmd.name({file_path}, extension={extension}")
+        logger.debug("Cmd.name(%s, extension=%s)", file_path, extension)
         file_name = os.path.basename(file_path)  # == somename.xxx
         if extension:
             return file_name
@@ -80,35 +79,41 @@ class Cmd():
 
     @staticmethod  #dirName
     def dirName(file_path):
-        logger.debug(f"Cmd.dirName({file_path}")
+        logger.debug("Cmd.dirName(%s)", file_path)
         dir_path = os.path.dirname(file_path)
         dir_name = os.path.basename(dir_path)
         return dir_name
 
     @staticmethod  #dirPath
     def dirPath(file_path):
-        logger.debug(f"Cmd.dirPath({file_path}")
+        logger.debug("Cmd.dirPath(%s)", file_path)
         dir_path = os.path.dirname(file_path)
         return dir_path
 
     @staticmethod  #isExist
     def isExist(path):
-        logger.debug(f"Cmd.isExist({path})")
+        logger.debug("Cmd.isExist(%s)", path)
         return os.path.exists(path)
 
     @staticmethod  #isFile
     def isFile(path):
-        logger.debug(f"Cmd.isFile({path})")
+        logger.debug("Cmd.isFile(%s)", path)
         return os.path.isfile(path)
 
     @staticmethod  #isDir
     def isDir(path):
-        logger.debug(f"Cmd.isFile({path})")
+        logger.debug("Cmd.isDir(%s)", path)
         return os.path.isdir(path)
 
+    @staticmethod  #getModified
+    def getModified(path):
+        """ Время последнего изменения файла, timestamp """
+        logger.debug("Cmd.getModified(%s)", path)
+        return os.path.getmtime(path)
+
     @staticmethod  #contents
     def contents(dir_path, full_path=False):
-        logger.debug(f"Cmd.getFiles({dir_path}, full_path={full_path})")
+        logger.debug("Cmd.contents(%s, full_path=%s)", dir_path, full_path)
         list_dirs_files = list()
         names = os.listdir(dir_path)
         for name in names:
@@ -121,7 +126,7 @@ class Cmd():
 
     @staticmethod  #getFiles
     def getFiles(dir_path, full_path=False):
-        logger.debug(f"Cmd.getFiles({dir_path}, full_path={full_path})")
+        logger.debug("Cmd.getFiles(%s, full_path=%s)", dir_path, full_path)
         list_files = list()
         names = os.listdir(dir_path)
         for name in names:
@@ -138,7 +143,7 @@ class Cmd():
         """ -- Doc
         Возвращает список папок в каталоге 'dir_path' без обхода подпапок
         """
-        logger.debug(f"Cmd.getDirs({dir_path}, full_path={full_path})")
+        logger.debug("Cmd.getDirs(%s, full_path=%s)", dir_path, full_path)
         list_dirs = list()
         names = os.listdir(dir_path)
         for name in names:
@@ -155,24 +160,24 @@ class Cmd():
         """ Создает все необходимые папки для этого пути """
         try:
             os.makedirs(path)
-            logger.debug(f"Create dirs: {path}")
+            logger.debug("Create dirs: %s", path)
         except FileExistsError as err:
             pass  # Если папка уже существует просто выходим
 
     @staticmethod  #deleteDir
     def deleteDir(path):
         shutil.rmtree(path)
-        logger.debug(f"Delete dir: {path}")
+        logger.debug("Delete dir: %s", path)
 
     @staticmethod  #extractArchive
     def extractArchive(archive_path, dest_dir):
         with zipfile.ZipFile(archive_path, "r") as file:
             file.extractall(dest_dir)
-        logger.debug(f"Extracted archive: '{archive_path}'")
+        logger.debug("Extracted archive: '%s'", archive_path)
 
     @staticmethod  #findFile
     def findFile(file_name, dir_path):
-        logger.debug(f"Cmd.findFile({file_name}, {dir_path})")
+        logger.debug("Cmd.findFile(%s, %s)", file_name, dir_path)
         for root, dirs, files in os.walk(dir_path):
             if file_name in files:
                 return os.path.join(root, file_name)
@@ -182,7 +187,7 @@ class Cmd():
 
     @staticmethod  #findDir
     def findDir(dir_name, root_dir):
-        logger.debug(f"Cmd.findDir({dir_name}, {root_dir})")
+        logger.debug("Cmd.findDir(%s, %s)", dir_name, root_dir)
         for root, dirs, files in os.walk(root_dir):
             if dir_name in dirs:
                 return os.path.join(root, dir_name)
@@ -222,11 +227,11 @@ class Cmd():
     def delete(file_path):
         """ Удаляет файла по указанному пути """
         os.remove(file_path)
-        logger.debug(f"Delete: {file_path}")
+        logger.debug("Delete: %s", file_path)
 
     @staticmethod  #subprocess
     def subprocess(command):
-        logger.debug(f"Cmd.subprocess({command}")
+        logger.debug("Cmd.subprocess(%s)", command)
         """
         import platform
         import subprocess
@@ -248,7 +253,7 @@ class Cmd():
         with open(file_path, "w", encoding="utf-8") as file:
             for line in text:
                 file.write(line)
-        logger.debug(f"Save file: {file_path}")
+        logger.debug("Save file: %s", file_path)
         return True
 
     @staticmethod  #load
@@ -258,7 +263,7 @@ class Cmd():
         with open(file_path, "r", encoding="utf-8") as file:
             for line in file:
                 text.append(line)
-        logger.debug(f"Cmd.load: {file_path}")
+        logger.debug("Cmd.load: %s", file_path)
         return text
 
     @staticmethod  #read
@@ -267,7 +272,7 @@ class Cmd():
         text = ""
         with open(file_path, "r", encoding="utf-8") as file:
             text = file.read()
-        logger.debug(f"Cmd.read: {file_path}")
+        logger.debug("Cmd.read: %s", file_path)
         return text
 
     @staticmethod  #append
@@ -275,19 +280,31 @@ class Cmd():
         with open(file_path, "a", encoding="utf-8") as file:
             for line in text:
                 file.write(line)
-        logger.debug(f"Cmd.append(text): {file_path}")
+        logger.debug("Cmd.append(text): %s", file_path)
         return True
 
     @staticmethod  #getTail
-    def getTail(file_path, n):
-        """ идиотский способ на самом деле.
-        по сути он же читает весь файл построчно и добавляет его в
-        очередь, у которой максимальная длина n... таким образом
-        дойдя до конца файла в очереди останется n последних строк
-        - тогда уж проще прочитать весь файл и взять N последний строк
+    def getTail(file_path, n, block_size=4096):
+        """ Return last n rows of file, <class list[<class str>]>
+        --
+        Файл читается блоками с конца, пока не наберется n полных
+        строк, поэтому время работы не зависит от размера файла.
         """
-        with open(file_path, "r", encoding="utf-8") as file:
-            text = list(deque(file, n))
+        if n <= 0:
+            return list()
+        with open(file_path, "rb") as file:
+            file.seek(0, os.SEEK_END)
+            pos = file.tell()
+            data = b""
+            # n + 1 переводов строки гарантируют, что n-я с конца
+            # строка прочитана целиком
+            while pos > 0 and data.count(b"\n") <= n:
+                size = min(block_size, pos)
+                pos -= size
+                file.seek(pos)
+                data = file.read(size) + data
+        lines = data.splitlines(keepends=True)[-n:]
+        text = [line.decode("utf-8") for line in lines]
         return text
 
     @staticmethod  #saveJSON
@@ -300,7 +317,7 @@ class Cmd():
                 default=encoder,
                 ensure_ascii=False,
                 )
-        logger.debug(f"Save json: {file_path}")
+        logger.debug("Save json: %s", file_path)
 
     @staticmethod  #loadJSON
     def loadJSON(file_path, decoder=decodeJSON):
@@ -309,7 +326,7 @@ class Cmd():
                 fp=file,
                 object_hook=decoder,
                 )
-        logger.debug(f"Load json: {file_path}")
+        logger.debug("Load json: %s", file_path)
         return obj
 
     @staticmethod  #saveBin
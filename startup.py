@@ -0,0 +1,78 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Проверка времени холодного старта
+
+Запускает 'python -X importtime' для модулей, которые main.py
+импортирует до показа окна (и до выполнения команды в консольном режиме),
+и сравнивает суммарное время импорта с бюджетом. Заодно проверяет, что
+тяжелые модули (moexalgo, pandas, numpy) при старте не импортируются -
+они загружаются лениво, при первом обращении к бирже.
+
+    python3 startup.py
+    python3 startup.py --budget 250
+
+Код завершения 1, если бюджет превышен или тяжелый модуль импортирован.
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+STARTUP_BUDGET = 300  # ms, суммарный импорт GUI модулей
+TARGETS = ("src.gui.download_dialog", "src.cli")
+HEAVY_MODULES = ("moexalgo", "pandas", "numpy")
+
+
+def importTime(module):
+    """ Возвращает (время импорта в ms, множество импортированных модулей) """
+    root = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+        )
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.rsplit("|", 2)
+        name = name.strip()
+        modules.add(name)
+        if name == module:
+            total = int(cumulative) / 1000
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бюджет времени старта")
+    parser.add_argument(
+        "--budget", type=int, default=STARTUP_BUDGET,
+        help=f"бюджет в ms, по умолчанию {STARTUP_BUDGET}",
+        )
+    args = parser.parse_args()
+    code = 0
+    for module in TARGETS:
+        total, modules = importTime(module)
+        heavy = [i for i in HEAVY_MODULES if i in modules]
+        status = "ok"
+        if total > args.budget:
+            status = f"over budget {args.budget} ms"
+            code = 1
+        if heavy:
+            status = f"heavy imports: {', '.join(heavy)}"
+            code = 1
+        print(f"{module:<28}{total:>8.1f} ms  {status}")
+    return code
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Замер записи и чтения годового файла в форматах csv и bin
+
+Синтетические 1m свечи (540 в торговый день, год - около 135 тысяч)
+записываются через Writer, как в MoexData.download, затем файл
+загружается в колонки Storage.load и читаются первая / последняя свечи
+Storage.stat (по нему строится индекс). Выводит время каждой операции
+и размер файла для каждого формата.
+
+    python3 storagebench.py
+    python3 storagebench.py --days 21 252 --storage bin
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from src.resample import Candle
+from src.storage import STORAGES, Writer, getStorage
+from src.utils import Cmd
+
+DAYS = (21, 252)  # торговых дней: месяц и год
+DAY_CANDLES = 540  # 10:00 - 19:00
+REPEATS = 5
+
+
+def iterCandles(begin, days):
+    """ Свечи 1m рабочих дней, начиная с begin """
+    day = begin
+    while days > 0:
+        if day.weekday() < 5:
+            for i in range(DAY_CANDLES):
+                dt = day + timedelta(hours=10, minutes=i)
+                yield Candle(
+                    100.0, 101.0, 102.0, 99.0, 1000.5, 10,
+                    dt, dt + timedelta(seconds=59),
+                    )
+            days -= 1
+        day += timedelta(days=1)
+
+
+def best(func):
+    """ Лучшее из REPEATS время вызова, мс """
+    seconds = None
+    for i in range(REPEATS):
+        begin = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - begin
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds * 1000
+
+
+def writeFile(storage, path, days):
+    """ Записывает days дней, возвращает (свечей, мс) """
+    begin = time.perf_counter()
+    with Writer(storage, path) as writer:
+        for candle in iterCandles(datetime(2024, 1, 1), days):
+            writer.write(candle)
+    return writer.count, (time.perf_counter() - begin) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запись и чтение csv/bin")
+    parser.add_argument(
+        "--days", type=int, nargs="+", default=DAYS,
+        help=f"торговых дней в файле, по умолчанию {DAYS}",
+        )
+    parser.add_argument(
+        "--storage", choices=list(STORAGES), nargs="+",
+        default=list(STORAGES), help="форматы хранения, по умолчанию все",
+        )
+    args = parser.parse_args()
+    tmp_dir = tempfile.mkdtemp()
+    code = 0
+    print(
+        f"{'STORAGE':<9}{'CANDLES':>10}{'MB':>7}{'WRITE, ms':>11}"
+        f"{'LOAD, ms':>10}{'STAT, ms':>10}"
+        )
+    for days in sorted(args.days):
+        for name in args.storage:
+            storage = getStorage(name)
+            path = Cmd.join(tmp_dir, f"SBER-1m-{days}{storage.EXTENSION}")
+            count, write = writeFile(storage, path, days)
+            loaded = len(storage.load(path)["close"])
+            if loaded != count:
+                print(f"{name:<9}{count:>10}  wrong load: {loaded}")
+                code = 1
+            load = best(lambda: storage.load(path))
+            stat = best(lambda: storage.stat(path))
+            size = storage.usage(path) / 2**20
+            print(
+                f"{name:<9}{count:>10}{size:>7.1f}{write:>11.1f}"
+                f"{load:>10.1f}{stat:>10.2f}"
+                )
+    return code
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env  python3
+# LICENSE:      GNU GPL
+# AUTHOR:       Alex Avin
+# E-MAIL:       mr.alexavin@gmail.com
+
+""" Doc
+Замер чтения последней строки годового .csv файла
+
+Создает файлы в формате CsvStorage разной длины (год 1m - около 130
+тысяч строк) и сравнивает Cmd.getTail(path, 1), который читает файл
+блоками с конца, с чтением всего файла через Cmd.load. Время
+Cmd.getTail не должно зависеть от размера файла.
+
+    python3 tailbench.py
+    python3 tailbench.py --rows 1000 1000000
+
+Код завершения 1, если getTail на самом большом файле медленнее, чем
+на самом маленьком, больше чем в MAX_GROWTH раз, или вернул не ту
+строку.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from src.resample import Candle
+from src.storage import CsvStorage
+from src.utils import Cmd
+
+ROWS = (1_000, 10_000, 100_000, 1_000_000)
+MAX_GROWTH = 3.0
+CALLS = 200
+REPEATS = 5
+
+
+def createFile(path, rows):
+    """ rows одинаковых строк и последняя - со своей датой """
+    storage = CsvStorage()
+    dt = datetime(2024, 1, 3, 10)
+    candle = Candle(
+        100.0, 101.0, 102.0, 99.0, 1000.5, 10,
+        dt, dt + timedelta(seconds=59),
+        )
+    line = storage.format(candle) + "\n"
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(storage.header() + "\n")
+        for i in range(rows - 1):
+            file.write(line)
+        candle.begin = datetime(2024, 12, 30, 18, 59)
+        candle.end = candle.begin + timedelta(seconds=59)
+        last = storage.format(candle) + "\n"
+        file.write(last)
+    return last
+
+
+def bench(func, calls):
+    """ Лучшее из REPEATS среднее время вызова, мкс """
+    best = None
+    for i in range(REPEATS):
+        begin = time.perf_counter()
+        for j in range(calls):
+            func()
+        seconds = (time.perf_counter() - begin) / calls
+        best = seconds if best is None else min(best, seconds)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Чтение хвоста .csv")
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=ROWS,
+        help=f"размеры файлов в строках, по умолчанию {ROWS}",
+        )
+    args = parser.parse_args()
+    tmp_dir = tempfile.mkdtemp()
+    code = 0
+    times = list()
+    print(f"{'ROWS':>10}{'MB':>8}{'getTail, us':>14}{'load, ms':>11}")
+    for rows in sorted(args.rows):
+        path = Cmd.join(tmp_dir, f"SBER-1m-{rows}.csv")
+        last = createFile(path, rows)
+        if Cmd.getTail(path, 1) != [last]:
+            print(f"{rows:>10}  wrong tail: {Cmd.getTail(path, 1)}")
+            code = 1
+        tail = bench(lambda: Cmd.getTail(path, 1), CALLS)
+        load = bench(lambda: Cmd.load(path), 1) / 1000
+        size = os.path.getsize(path) / 2**20
+        Cmd.delete(path)
+        times.append(tail)
+        print(f"{rows:>10}{size:>8.1f}{tail:>14.1f}{load:>11.1f}")
+    growth = times[-1] / times[0]
+    status = "ok"
+    if growth > MAX_GROWTH:
+        status = f"grows with file size, max {MAX_GROWTH}x"
+        code = 1
+    print(f"getTail growth {growth:.1f}x  {status}")
+    return code
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())